@@ -0,0 +1,21 @@
+"""problem testcase version
+
+Revision ID: 20261018_0002
+Revises: 20250907_0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0002"
+down_revision = "20250907_0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("problems", sa.Column("testcase_version", sa.Integer(), nullable=False, server_default=sa.text("0")))
+
+def downgrade():
+    with op.batch_alter_table("problems") as batch:
+        batch.drop_column("testcase_version")
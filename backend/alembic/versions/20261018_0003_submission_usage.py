@@ -0,0 +1,23 @@
+"""submission cpu and memory usage
+
+Revision ID: 20261018_0003
+Revises: 20261018_0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0003"
+down_revision = "20261018_0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("submissions", sa.Column("cpu_ms", sa.Float(), nullable=True))
+    op.add_column("submissions", sa.Column("memory_kb", sa.Integer(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("submissions") as batch:
+        batch.drop_column("memory_kb")
+        batch.drop_column("cpu_ms")
@@ -0,0 +1,45 @@
+"""per-test submission metrics
+
+Revision ID: 20261018_0004
+Revises: 20261018_0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0004"
+down_revision = "20261018_0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "submission_tests",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("submission_id", sa.Integer(), sa.ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("idx", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("passed", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("wall_ms", sa.Float(), nullable=True),
+        sa.Column("cpu_ms", sa.Float(), nullable=True),
+        sa.Column("memory_kb", sa.Integer(), nullable=True),
+    )
+    op.create_index("ix_submission_tests_submission_id", "submission_tests", ["submission_id"])
+
+    op.add_column("submissions", sa.Column("wall_ms_max", sa.Float(), nullable=True))
+    op.add_column("submissions", sa.Column("wall_ms_p50", sa.Float(), nullable=True))
+    op.add_column("submissions", sa.Column("cpu_ms_max", sa.Float(), nullable=True))
+    op.add_column("submissions", sa.Column("cpu_ms_p50", sa.Float(), nullable=True))
+    op.add_column("submissions", sa.Column("memory_kb_p50", sa.Integer(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("submissions") as batch:
+        batch.drop_column("memory_kb_p50")
+        batch.drop_column("cpu_ms_p50")
+        batch.drop_column("cpu_ms_max")
+        batch.drop_column("wall_ms_p50")
+        batch.drop_column("wall_ms_max")
+
+    op.drop_index("ix_submission_tests_submission_id", table_name="submission_tests")
+    op.drop_table("submission_tests")
@@ -0,0 +1,26 @@
+"""accepted submission performance histograms
+
+Revision ID: 20261018_0005
+Revises: 20261018_0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0005"
+down_revision = "20261018_0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "problem_perf_buckets",
+        sa.Column("problem_id", sa.Integer(), sa.ForeignKey("problems.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("metric", sa.String(length=16), primary_key=True),
+        sa.Column("bucket", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+def downgrade():
+    op.drop_table("problem_perf_buckets")
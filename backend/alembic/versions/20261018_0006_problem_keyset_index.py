@@ -0,0 +1,21 @@
+"""index for keyset pagination of problems
+
+Revision ID: 20261018_0006
+Revises: 20261018_0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0006"
+down_revision = "20261018_0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_problems_created_at_id", "problems", ["created_at", "id"])
+    op.create_index("ix_problems_domain_difficulty", "problems", ["domain", "difficulty"])
+
+def downgrade():
+    op.drop_index("ix_problems_domain_difficulty", table_name="problems")
+    op.drop_index("ix_problems_created_at_id", table_name="problems")
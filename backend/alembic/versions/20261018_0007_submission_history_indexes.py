@@ -0,0 +1,25 @@
+"""composite indexes for submission history
+
+Revision ID: 20261018_0007
+Revises: 20261018_0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0007"
+down_revision = "20261018_0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # history, diff and attempt numbering: one user's attempts at one problem in submission order
+    op.create_index("ix_submissions_user_problem_created", "submissions", ["user_id", "problem_id", "created_at", "id"])
+    # "my submissions" newest first; also covers every lookup the single-column user_id index served
+    op.create_index("ix_submissions_user_id_id", "submissions", ["user_id", "id"])
+    op.drop_index("ix_submissions_user_id", table_name="submissions")
+
+def downgrade():
+    op.create_index("ix_submissions_user_id", "submissions", ["user_id"])
+    op.drop_index("ix_submissions_user_id_id", table_name="submissions")
+    op.drop_index("ix_submissions_user_problem_created", table_name="submissions")
@@ -0,0 +1,42 @@
+"""persisted per-user attempt numbers
+
+Revision ID: 20261018_0008
+Revises: 20261018_0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0008"
+down_revision = "20261018_0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("submissions") as batch:
+        batch.add_column(sa.Column("attempt_no", sa.Integer(), nullable=True))
+    # number existing attempts in submission order; each count is a range read on
+    # ix_submissions_user_problem_created
+    op.execute(
+        """
+        UPDATE submissions SET attempt_no = (
+            SELECT COUNT(*) FROM submissions AS prev
+            WHERE prev.user_id = submissions.user_id
+              AND prev.problem_id = submissions.problem_id
+              AND (prev.created_at < submissions.created_at
+                   OR (prev.created_at = submissions.created_at AND prev.id <= submissions.id))
+        )
+        WHERE user_id IS NOT NULL
+        """
+    )
+    op.create_index("uq_submissions_user_problem_attempt", "submissions",
+                    ["user_id", "problem_id", "attempt_no"], unique=True)
+    # history and diff now read by attempt_no, so the unique index replaces this one
+    op.drop_index("ix_submissions_user_problem_created", table_name="submissions")
+
+def downgrade():
+    op.create_index("ix_submissions_user_problem_created", "submissions", ["user_id", "problem_id", "created_at", "id"])
+    op.drop_index("uq_submissions_user_problem_attempt", table_name="submissions")
+    with op.batch_alter_table("submissions") as batch:
+        batch.drop_column("attempt_no")
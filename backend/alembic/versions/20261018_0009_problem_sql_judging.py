@@ -0,0 +1,28 @@
+"""SQL problems: dataset, reference query and comparison options
+
+Revision ID: 20261018_0009
+Revises: 20261018_0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0009"
+down_revision = "20261018_0008"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("problems") as batch:
+        batch.add_column(sa.Column("sql_dataset", sa.String(length=50), nullable=True))
+        batch.add_column(sa.Column("reference_sql", sa.Text(), nullable=True))
+        batch.add_column(sa.Column("sql_ordered", sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch.add_column(sa.Column("sql_float_tolerance", sa.Float(), nullable=False, server_default=sa.text("0")))
+
+def downgrade():
+    with op.batch_alter_table("problems") as batch:
+        batch.drop_column("sql_float_tolerance")
+        batch.drop_column("sql_ordered")
+        batch.drop_column("reference_sql")
+        batch.drop_column("sql_dataset")
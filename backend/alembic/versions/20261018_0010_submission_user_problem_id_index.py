@@ -0,0 +1,20 @@
+"""index for one user's submissions to one problem by id
+
+Revision ID: 20261018_0010
+Revises: 20261018_0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0010"
+down_revision = "20261018_0009"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # list_submissions?problem_id orders by id desc; without it the page is sorted in a temp B-tree
+    op.create_index("ix_submissions_user_problem_id", "submissions", ["user_id", "problem_id", "id"])
+
+def downgrade():
+    op.drop_index("ix_submissions_user_problem_id", table_name="submissions")
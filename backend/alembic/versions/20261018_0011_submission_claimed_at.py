@@ -0,0 +1,22 @@
+"""claim time of submissions taken off the judge queue
+
+Revision ID: 20261018_0011
+Revises: 20261018_0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0011"
+down_revision = "20261018_0010"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # a judge flips Queued to Running with a claim time; startup re-queues what was never finished
+    op.add_column("submissions", sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("submissions") as batch:
+        batch.drop_column("claimed_at")
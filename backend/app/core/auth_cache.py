@@ -0,0 +1,82 @@
+import threading, time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+from .config import Settings
+
+settings = Settings()
+
+# Short-lived caches for request authentication: decoded tokens and active users.
+# Entries expire after AUTH_CACHE_TTL_SEC, which bounds how long another worker
+# keeps serving a user that was deactivated elsewhere.
+
+class AuthUser(NamedTuple):
+    """Immutable snapshot of the authenticated user, safe to share between requests."""
+    id: int
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    is_active: bool = True
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl_sec: float):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[Any, tuple[float, Any]]" = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl_sec: Optional[float] = None) -> None:
+        ttl = self.ttl_sec if ttl_sec is None else min(ttl_sec, self.ttl_sec)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+tokens = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SEC)  # token -> user id
+users = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SEC)   # user id -> AuthUser
+# users deactivated by this process; claims-only auth has no other way to notice
+_deactivated: set[int] = set()
+_deactivated_lock = threading.Lock()
+
+def deactivated(user_id: int) -> bool:
+    return user_id in _deactivated
+
+def invalidate_user(user_id: int, deactivate: bool = False) -> None:
+    users.pop(user_id)
+    if deactivate:
+        with _deactivated_lock:
+            _deactivated.add(user_id)
+
+def stats() -> dict:
+    return {"tokens": tokens.stats(), "users": users.stats(), "trust_token_claims": settings.AUTH_TRUST_TOKEN_CLAIMS}
@@ -0,0 +1,117 @@
+import gzip, re
+from typing import Optional
+import anyio
+from .config import Settings
+
+try:  # optional: brotli is used when installed and the client accepts it
+    import brotli
+except ImportError:
+    brotli = None
+
+settings = Settings()
+
+_COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/plain", "text/html", "text/csv")
+_OFFLOAD_BYTES = 64 * 1024  # larger bodies are compressed off the event loop
+_CODING = re.compile(r"\s*([a-z0-9*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?", re.I)
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best of br/gzip the client accepts (q > 0), preferring br on ties."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        m = _CODING.match(part)
+        if m:
+            try:
+                accepted[m.group(1).lower()] = float(m.group(2) or 1)
+            except ValueError:
+                continue
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in (("br",) if brotli else ()) + ("gzip",):
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+class CompressionMiddleware:
+    """Compresses complete JSON/text responses of at least `min_size` bytes.
+
+    Streaming responses (server-sent events, exports) are passed through untouched,
+    since buffering them would hold back every chunk until the end. ETags of
+    negotiated responses are made weak: the representation differs per encoding,
+    and If-None-Match compares weakly, so revalidation still gets its 304.
+    """
+    def __init__(self, app, min_size: int = settings.COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.min_size <= 0:
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        coding = choose_encoding(accept)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            headers = list(start["headers"])
+            if start["status"] == 304:
+                # revalidation of a negotiated response: echo the ETag the way the 200 carried it
+                passthrough = True
+                await send(dict(start, headers=_vary(_weaken_etag(headers))))
+                await send(message)
+                return
+            ctype = next((v for k, v in headers if k.lower() == b"content-type"), b"").decode("latin-1")
+            if ctype.split(";")[0].strip() not in _COMPRESSIBLE or any(k.lower() == b"content-encoding" for k, _ in headers):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            headers = _vary(_weaken_etag(headers))
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.min_size:
+                passthrough = True
+                await send(dict(start, headers=headers))
+                await send(message)
+                return
+            if len(body) >= _OFFLOAD_BYTES:
+                body = await anyio.to_thread.run_sync(compress, body, coding)
+            else:
+                body = compress(body, coding)
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+            headers += [(b"content-encoding", coding.encode()), (b"content-length", str(len(body)).encode())]
+            await send(dict(start, headers=headers))
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, wrapped_send)
+
+def _weaken_etag(headers: list) -> list:
+    return [(k, b"W/" + v if k.lower() == b"etag" and not v.startswith(b"W/") else v) for k, v in headers]
+
+def _vary(headers: list) -> list:
+    for i, (k, v) in enumerate(headers):
+        if k.lower() == b"vary":
+            if b"accept-encoding" not in v.lower():
+                headers[i] = (k, v + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
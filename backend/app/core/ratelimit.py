@@ -1,10 +1,108 @@
-import time
-from collections import deque
-from typing import Deque, Dict
+import math, os, sqlite3, threading, time
+from typing import Dict
 from fastapi import Request, HTTPException
+from .config import Settings
 
-# in-memory store: scope+ip -> timestamps
-_BUCKETS: Dict[str, Deque[float]] = {}
+settings = Settings()
+
+# GCRA: each key stores one number, its theoretical arrival time (TAT). A request
+# is allowed when pushing the TAT one emission interval forward keeps it within
+# one window of now. A key whose TAT is in the past holds no state worth keeping,
+# so idle keys can be dropped at any time without changing any decision.
+
+def _gcra(tat: float | None, now: float, limit: int, window: float) -> tuple[float | None, float]:
+    """Returns (new TAT or None when rejected, seconds until a retry can succeed)."""
+    interval = window / limit
+    new_tat = max(tat or now, now) + interval
+    if new_tat - now > window:
+        return None, new_tat - window - now
+    return new_tat, 0.0
+
+class MemoryBackend:
+    """Per-process limiter state; one float per active key."""
+    name = "memory"
+
+    def __init__(self, sweep_sec: float, max_keys: int):
+        self.sweep_sec = sweep_sec
+        self.max_keys = max_keys
+        self._tat: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_sec
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        """Records a request; returns 0 when allowed, else the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep or len(self._tat) >= self.max_keys:
+                self._sweep(now)
+            new_tat, retry = _gcra(self._tat.get(key), now, limit, window)
+            if new_tat is not None:
+                self._tat[key] = new_tat
+            return retry
+
+    def _sweep(self, now: float) -> None:
+        self._tat = {k: t for k, t in self._tat.items() if t > now}
+        # still full of active keys (e.g. a scan): drop the oldest tenth, which fails open for them
+        for k in list(self._tat)[:max(0, len(self._tat) - self.max_keys * 9 // 10)]:
+            del self._tat[k]
+        self._next_sweep = now + self.sweep_sec
+
+    def size(self) -> int:
+        return len(self._tat)
+
+class SqliteBackend:
+    """Limiter state in a SQLite file, shared by every worker process on the host."""
+    name = "sqlite"
+
+    def __init__(self, path: str, sweep_sec: float):
+        self.path = os.path.abspath(path)
+        self.sweep_sec = sweep_sec
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        # wall clock, since the state is compared across processes
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            new_tat, retry = _gcra(row[0] if row else None, now, limit, window)
+            if new_tat is not None:
+                conn.execute("INSERT OR REPLACE INTO rate_limits (key, tat) VALUES (?, ?)", (key, new_tat))
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_sec
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return retry
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+def _make_backend():
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        return SqliteBackend(settings.RATE_LIMIT_SQLITE_PATH, settings.RATE_LIMIT_SWEEP_SEC)
+    return MemoryBackend(settings.RATE_LIMIT_SWEEP_SEC, settings.RATE_LIMIT_MAX_KEYS)
+
+backend = _make_backend()
+_rejected = 0
+
+def stats() -> dict:
+    return {"backend": backend.name, "keys": backend.size(), "rejected": _rejected}
 
 def limit_dep(scope: str, limit: int, window_seconds: int):
     """
@@ -12,17 +110,11 @@ def limit_dep(scope: str, limit: int, window_seconds: int):
     per client IP for the given `scope`.
     """
     def _dep(request: Request):
-        now = time.monotonic()
+        global _rejected
         ip = request.client.host if request.client else "unknown"
-        key = f"{scope}:{ip}"
-        dq = _BUCKETS.get(key)
-        if dq is None:
-            dq = deque()
-            _BUCKETS[key] = dq
-        # drop old timestamps
-        while dq and (now - dq[0]) > window_seconds:
-            dq.popleft()
-        if len(dq) >= limit:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded. Try again later.")
-        dq.append(now)
+        retry = backend.hit(f"{scope}:{ip}", limit, window_seconds)
+        if retry > 0:
+            _rejected += 1
+            raise HTTPException(status_code=429, detail="Rate limit exceeded. Try again later.",
+                                headers={"Retry-After": str(math.ceil(retry))})
     return _dep
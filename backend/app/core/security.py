@@ -1,3 +1,5 @@
+import atexit, multiprocessing, threading, time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt, JWTError
@@ -10,22 +12,114 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# hashes at any other cost are rehashed on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+class HashingBusy(Exception):
+    """Too many password hashes are already queued."""
+
+# bcrypt runs in its own process pool so login storms cannot take over the API's
+# threadpool; callers beyond PASSWORD_HASH_MAX_PENDING are turned away at once.
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_pending = 0
+_stats = {"completed": 0, "rejected": 0, "wait_ms_total": 0.0, "hash_ms_total": 0.0}
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    return fn(*args), (time.perf_counter() - t0) * 1000.0
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the API process has threads, which fork would copy mid-flight
+            _pool = ProcessPoolExecutor(settings.PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(shutdown_hashing)
+        return _pool
+
+def shutdown_hashing() -> None:
+    """Stops the hashing workers; called on app shutdown, since servers that re-raise
+    SIGTERM after a graceful stop never reach atexit and would orphan them."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _run(fn, *args):
+    global _pending
+    with _pool_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            _stats["rejected"] += 1
+            raise HashingBusy()
+        _pending += 1
+    t0 = time.perf_counter()
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            result, hash_ms = _timed(fn, *args)
+        else:
+            result, hash_ms = _get_pool().submit(_timed, fn, *args).result()
+    finally:
+        with _pool_lock:
+            _pending -= 1
+    with _pool_lock:
+        _stats["completed"] += 1
+        _stats["hash_ms_total"] += hash_ms
+        _stats["wait_ms_total"] += max(0.0, (time.perf_counter() - t0) * 1000.0 - hash_ms)
+    return result
+
+def hashing_stats() -> dict:
+    with _pool_lock:
+        done = _stats["completed"]
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "rounds": settings.BCRYPT_ROUNDS,
+            "pending": _pending,
+            "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+            "completed": done,
+            "rejected": _stats["rejected"],
+            "wait_ms_avg": _stats["wait_ms_total"] / done if done else 0.0,
+            "hash_ms_avg": _stats["hash_ms_total"] / done if done else 0.0,
+        }
+
+# module-level so the pool can pickle them by name
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _run(_verify, plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Returns (valid, new hash when the stored one uses another cost, else None)."""
+    return _run(_verify_and_update, plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    return _run(_hash, password)
+
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode = {"sub": subject, "exp": expire}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def decode_token(token: str) -> Optional[str]:
+def decode_claims(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
+
+def decode_token(token: str) -> Optional[str]:
+    payload = decode_claims(token)
+    return payload.get("sub") if payload else None
@@ -1,11 +1,36 @@
+import functools, inspect
+
+from fastapi import Depends, Request, Response
+from fastapi.exceptions import ResponseValidationError
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from starlette.concurrency import run_in_threadpool
 from ..core.config import Settings
 
 settings = Settings()
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+def _engine_options(url: str) -> dict:
+    opts = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() != "sqlite":
+        opts.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SEC,
+            pool_recycle=settings.DB_POOL_RECYCLE_SEC,
+        )
+    return opts
+
+def async_url(url: str) -> str:
+    u = make_url(url)
+    driver = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}.get(u.get_backend_name())
+    if driver is None:
+        raise ValueError(f"no async driver known for {u.get_backend_name()}; set ASYNC_DATABASE_URL")
+    return u.set(drivername=f"{u.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -16,3 +41,60 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    # optional: only importable with greenlet and an async driver installed
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _url = settings.ASYNC_DATABASE_URL or async_url(DATABASE_URL)
+    async_engine = create_async_engine(_url, **_engine_options(_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def offload(fn, *args, **kwargs):
+    """Calls CPU-bound `fn` from an endpoint body. Under async_route the body runs on the
+    event loop, so the call is made in the threadpool and the loop keeps serving other
+    requests meanwhile; anywhere else it is a plain call. `fn` must not use the session."""
+    if settings.DB_ASYNC and in_greenlet():
+        return await_only(run_in_threadpool(fn, *args, **kwargs))
+    return fn(*args, **kwargs)
+
+def _render(field, content) -> Response:
+    # what FastAPI does with an endpoint's return value, done here so that it runs off the loop
+    value, errors = field.validate(content, {}, loc=("response",))
+    if errors:
+        raise ResponseValidationError(errors=errors, body=content)
+    return Response(field.serialize_json(value, by_alias=True), media_type="application/json")
+
+def async_route(fn):
+    """Serves a sync `db: Session` endpoint from an AsyncSession when DB_ASYNC is on.
+
+    The endpoint body runs through `AsyncSession.run_sync`, so its ORM code is unchanged
+    but database I/O is awaited on the event loop instead of holding a threadpool thread.
+    Only the body's ORM work belongs there: CPU-bound steps go through offload(), and the
+    result is validated against the route's response model and serialized in the
+    threadpool. With DB_ASYNC off the endpoint is returned as is.
+    """
+    if not settings.DB_ASYNC:
+        return fn
+    sig = inspect.signature(fn)
+    params = [p.replace(default=Depends(get_async_db)) if p.name == "db" else p for p in sig.parameters.values()]
+    params.append(inspect.Parameter("async_route_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+    @functools.wraps(fn)
+    async def endpoint(async_route_request: Request, **kwargs):
+        db = kwargs.pop("db")
+        content = await db.run_sync(lambda session: fn(db=session, **kwargs))
+        field = getattr(async_route_request.scope.get("route"), "response_field", None)
+        if field is None or isinstance(content, Response):
+            return content
+        # everything the response needs was loaded by the body, so no lazy load can reach the session
+        return await run_in_threadpool(_render, field, content)
+
+    endpoint.__signature__ = sig.replace(parameters=sorted(params, key=lambda p: p.kind))
+    return endpoint
@@ -1,9 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from .core.config import Settings
-from .routers import health, problems, auth, users, testcases, submissions
+from .core.compression import CompressionMiddleware
+from .core.responses import ORJSONResponse
+from .core.security import shutdown_hashing
+from .services import sql_datasets
+from .routers import health, problems, auth, users, testcases, submissions, sql
 
-app = FastAPI(title="Interview Prep Platform API", version="0.3.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.SQL_PREBUILD:
+        sql_datasets.prebuild()
+    # submissions a previous run left queued; the judge queue itself lives in memory
+    await run_in_threadpool(submissions.resume_queued)
+    yield
+    shutdown_hashing()
+
+app = FastAPI(title="Interview Prep Platform API", version="0.3.0", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
 settings = Settings()
 
 app.add_middleware(
@@ -13,6 +29,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(health.router)
 app.include_router(problems.router)
@@ -20,6 +37,7 @@ app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(testcases.router)
 app.include_router(submissions.router)
+app.include_router(sql.router)
 
 @app.get("/", summary="Root")
 def root():
@@ -0,0 +1,12 @@
+from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from ..db.session import Base
+
+class ProblemPerfBucket(Base):
+    """One histogram bucket of accepted-submission performance for a problem."""
+    __tablename__ = "problem_perf_buckets"
+
+    problem_id: Mapped[int] = mapped_column(Integer, ForeignKey("problems.id", ondelete="CASCADE"), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(16), primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,9 +1,14 @@
-from sqlalchemy import Integer, String, Text, DateTime, func
+from sqlalchemy import Boolean, Float, Integer, String, Text, DateTime, Index, false, func
 from sqlalchemy.orm import Mapped, mapped_column
 from ..db.session import Base
 
 class Problem(Base):
     __tablename__ = "problems"
+    __table_args__ = (
+        # keyset pagination walks (created_at, id); titles are unique, so title order needs no extra index
+        Index("ix_problems_created_at_id", "created_at", "id"),
+        Index("ix_problems_domain_difficulty", "domain", "difficulty"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(200), unique=True, nullable=False)
@@ -11,5 +16,12 @@ class Problem(Base):
     body: Mapped[str] = mapped_column(Text, nullable=False)
     domain: Mapped[str] = mapped_column(String(50), nullable=False)
     difficulty: Mapped[str] = mapped_column(String(20), nullable=False)
+    # bumped on every testcase write; versions cached testcase bundles and verdicts
+    testcase_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # SQL problems: submissions are judged against the reference query's result on this dataset
+    sql_dataset: Mapped[str | None] = mapped_column(String(50))
+    reference_sql: Mapped[str | None] = mapped_column(Text)
+    sql_ordered: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
+    sql_float_tolerance: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
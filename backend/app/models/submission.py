@@ -1,17 +1,49 @@
-from sqlalchemy import Integer, String, Text, Float, DateTime, ForeignKey, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Text, Float, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..db.session import Base
+from .submission_test import SubmissionTest
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # attempts are numbered 1, 2, ... per (user, problem); also the index history reads walk
+        Index("uq_submissions_user_problem_attempt", "user_id", "problem_id", "attempt_no", unique=True),
+        Index("ix_submissions_user_id_id", "user_id", "id"),
+        # list_submissions?problem_id pages newest first by id
+        Index("ix_submissions_user_problem_id", "user_id", "problem_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     problem_id: Mapped[int] = mapped_column(Integer, ForeignKey("problems.id", ondelete="CASCADE"), index=True, nullable=False)
-    user_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), index=True, nullable=True)
+    user_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    attempt_no: Mapped[int | None] = mapped_column(Integer)
     language: Mapped[str] = mapped_column(String(32), nullable=False)
-    code: Mapped[str] = mapped_column(Text, nullable=False)
+    code: Mapped[str] = mapped_column(Text, nullable=False, deferred=True)  # only loaded by code and diff views
     status: Mapped[str] = mapped_column(String(32), nullable=False)
-    runtime_ms: Mapped[float | None] = mapped_column(Float)
+    runtime_ms: Mapped[float | None] = mapped_column(Float)    # wall time, summed over tests
+    cpu_ms: Mapped[float | None] = mapped_column(Float)        # user+sys, summed over tests
+    memory_kb: Mapped[int | None] = mapped_column(Integer)     # peak RSS of the hungriest test
+    wall_ms_max: Mapped[float | None] = mapped_column(Float)
+    wall_ms_p50: Mapped[float | None] = mapped_column(Float)
+    cpu_ms_max: Mapped[float | None] = mapped_column(Float)
+    cpu_ms_p50: Mapped[float | None] = mapped_column(Float)
+    memory_kb_p50: Mapped[int | None] = mapped_column(Integer)
     passed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     total_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # when a judge took the queued row (status Running); a stale claim means the judge died
+    claimed_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True))
+
+    tests: Mapped[list[SubmissionTest]] = relationship(
+        cascade="all, delete-orphan", passive_deletes=True, order_by=SubmissionTest.idx
+    )
+
+    @property
+    def metrics(self) -> dict | None:
+        if self.runtime_ms is None and self.cpu_ms is None:
+            return None
+        return {
+            "wall_ms": {"max": self.wall_ms_max, "p50": self.wall_ms_p50, "sum": self.runtime_ms},
+            "cpu_ms": {"max": self.cpu_ms_max, "p50": self.cpu_ms_p50, "sum": self.cpu_ms},
+            "memory_kb": {"max": self.memory_kb, "p50": self.memory_kb_p50, "sum": None},
+        }
@@ -0,0 +1,16 @@
+from sqlalchemy import Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from ..db.session import Base
+
+class SubmissionTest(Base):
+    """Per-test outcome and resource usage of a judged submission."""
+    __tablename__ = "submission_tests"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    submission_id: Mapped[int] = mapped_column(Integer, ForeignKey("submissions.id", ondelete="CASCADE"), index=True, nullable=False)
+    idx: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    passed: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    wall_ms: Mapped[float | None] = mapped_column(Float)
+    cpu_ms: Mapped[float | None] = mapped_column(Float)
+    memory_kb: Mapped[int | None] = mapped_column(Integer)
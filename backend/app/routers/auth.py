@@ -1,24 +1,39 @@
+import time
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Security
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
-from ..db.session import get_db
+from ..db.session import get_db, get_async_db
 from ..models.user import User
 from ..schemas.user import UserCreate, UserRead
-from ..core.security import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, decode_token
+from ..core.security import HashingBusy, verify_and_update, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, decode_claims
 from ..core.ratelimit import limit_dep
+from ..core import auth_cache
+from ..core.auth_cache import AuthUser
 from ..core.config import Settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 settings = Settings()
 bearer_scheme = HTTPBearer()
 
+def _busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Too many sign-ins in progress. Try again shortly.",
+                         headers={"Retry-After": "1"})
+
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     user = db.query(User).filter(User.email == email).first()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    try:
+        valid, new_hash = verify_and_update(password, user.hashed_password)
+    except HashingBusy:
+        raise _busy()
+    if not valid:
         return None
+    if new_hash:
+        # stored with another work factor; upgrade while we hold the plaintext
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
 @router.post("/register", response_model=UserRead, summary="Register a new user",
@@ -27,10 +42,14 @@ def register(payload: UserCreate, db: Session = Depends(get_db)):
     existing = db.query(User).filter(User.email == payload.email).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        hashed_password = get_password_hash(payload.password)
+    except HashingBusy:
+        raise _busy()
     user = User(
         email=payload.email,
         full_name=payload.full_name,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=hashed_password,
         is_active=True,
     )
     db.add(user)
@@ -47,15 +66,50 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     token = create_access_token(subject=str(user.id), expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     return {"access_token": token, "token_type": "bearer"}
 
-def get_current_user(
+def _token_user_id(token: str) -> int:
+    user_id = auth_cache.tokens.get(token)
+    if user_id is None:
+        payload = decode_claims(token)
+        sub = payload.get("sub") if payload else None
+        if sub is None:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        user_id = int(sub)
+        auth_cache.tokens.put(token, user_id, ttl_sec=payload.get("exp", 0) - time.time())
+    return user_id
+
+def _auth_user(row: User | None) -> AuthUser:
+    if not row or not row.is_active:
+        raise HTTPException(status_code=401, detail="Inactive or missing user")
+    user = AuthUser(row.id, row.email, row.full_name, row.is_active)
+    auth_cache.users.put(row.id, user)
+    return user
+
+def _get_current_user_sync(
     db: Session = Depends(get_db),
     creds: HTTPAuthorizationCredentials = Security(bearer_scheme)
-) -> User:
-    token = creds.credentials
-    sub = decode_token(token)
-    if sub is None:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = db.query(User).get(int(sub))
-    if not user or not user.is_active:
+) -> AuthUser:
+    user_id = _token_user_id(creds.credentials)
+    return auth_cache.users.get(user_id) or _auth_user(db.get(User, user_id))
+
+async def _get_current_user_async(
+    db = Depends(get_async_db),
+    creds: HTTPAuthorizationCredentials = Security(bearer_scheme)
+) -> AuthUser:
+    # runs on the event loop: a cache hit needs no connection, a miss awaits the async pool
+    user_id = _token_user_id(creds.credentials)
+    return auth_cache.users.get(user_id) or _auth_user(await db.get(User, user_id))
+
+# with DB_ASYNC the user is loaded through the async engine like async_route endpoints,
+# so those requests never check out a sync connection or a threadpool thread
+get_current_user = _get_current_user_async if settings.DB_ASYNC else _get_current_user_sync
+
+async def get_token_user(creds: HTTPAuthorizationCredentials = Security(bearer_scheme)) -> AuthUser:
+    """Claims-only authentication: the user id from a valid token, without loading the user.
+    No I/O, so it runs on the event loop rather than the threadpool."""
+    user_id = _token_user_id(creds.credentials)
+    if auth_cache.deactivated(user_id):
         raise HTTPException(status_code=401, detail="Inactive or missing user")
-    return user
+    return AuthUser(user_id)
+
+# dependency for read-only routes
+get_reader = get_token_user if settings.AUTH_TRUST_TOKEN_CLAIMS else get_current_user
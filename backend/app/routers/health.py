@@ -1,7 +1,28 @@
 from fastapi import APIRouter
+from ..services.judge_queue import queue as judge_queue
+from ..services import verdict_cache, testcase_bundles, problem_counts, response_cache, sql_engine, sql_judge, run_uids
+from ..services.search_index import index as search_index
+from ..core import ratelimit, auth_cache, security
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 @router.get("", summary="Health check")
 def health_root():
     return {"status": "ok"}
+
+@router.get("/metrics", summary="Internal queue and cache metrics")
+def health_metrics():
+    return {
+        "judge_queue": judge_queue.stats(),
+        "verdict_cache": verdict_cache.cache.stats(),
+        "testcase_bundles": testcase_bundles.cache.stats(),
+        "search_index": search_index.stats(),
+        "problem_counts": problem_counts.counts.stats(),
+        "response_cache": response_cache.cache.stats(),
+        "sql_results": sql_engine.results.stats(),
+        "sql_references": sql_judge.references.stats(),
+        "run_uids": run_uids.pool.stats(),
+        "rate_limiter": ratelimit.stats(),
+        "auth_cache": auth_cache.stats(),
+        "password_hashing": security.hashing_stats(),
+    }
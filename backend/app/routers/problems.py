@@ -1,60 +1,146 @@
+import base64, json
+from datetime import datetime
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal, tuple_
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
-from ..db.session import get_db
+from ..db.session import get_db, async_route, offload
 from ..models.problem import Problem
-from ..schemas.problem import ProblemCreate, ProblemRead, ProblemPage
+from ..schemas.problem import ProblemCreate, ProblemRead, ProblemPage, ProblemStats
+from ..services import perf_index, problem_counts, sql_datasets, sql_engine, sql_judge
+from ..services.response_cache import CachedRoute, cache as response_cache, cached
+from ..services.search_index import index as search_index
 from .auth import get_current_user
 from ..core.ratelimit import limit_dep
 from ..core.config import Settings
 
-router = APIRouter(prefix="/problems", tags=["problems"])
+router = APIRouter(prefix="/problems", tags=["problems"], route_class=CachedRoute)
 settings = Settings()
 
+_SORTS = {
+    "created_desc": (Problem.created_at, False),
+    "created_asc": (Problem.created_at, True),
+    "title_asc": (Problem.title, True),
+}
+
+def _encode_cursor(sort: str, key) -> str:
+    raw = json.dumps([sort, key], separators=(",", ":"), default=lambda v: v.isoformat())
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort: str):
+    """The position a cursor encodes: an offset for relevance, [sort value, id] otherwise."""
+    try:
+        got, key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if got != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort")
+    try:
+        if sort == "relevance":
+            if type(key) is not int or key < 0:
+                raise ValueError(key)
+            return key
+        value, last_id = key
+        if type(last_id) is not int or not isinstance(value, str):
+            raise ValueError(key)
+        if _SORTS[sort][0] is Problem.created_at:
+            value = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return [value, last_id]
+
+def _after(db: Session, sort: str, key: list):
+    """Filter for rows strictly after `key` = [sort value, id] in `sort` order."""
+    col, asc = _SORTS[sort]
+    value, last_id = key
+    if col is Problem.created_at:
+        # SQLite stores CURRENT_TIMESTAMP text; compare in that same format so the index stays usable
+        bound = func.datetime(value) if db.bind.dialect.name == "sqlite" else literal(value, col.type)
+    else:
+        bound = literal(value, col.type)
+    keys, bounds = tuple_(col, Problem.id), tuple_(bound, last_id)
+    return keys > bounds if asc else keys < bounds
+
+def _sort_key(p: Problem, sort: str) -> list:
+    return [getattr(p, _SORTS[sort][0].key), p.id]
+
 @router.get("", response_model=List[ProblemRead], summary="List problems (legacy simple list)")
+@cached("problems")
+@async_route
 def list_problems(
     db: Session = Depends(get_db),
     q: str | None = Query(default=None, description="Search in title"),
     limit: int = 20,
     offset: int = 0,
+    before_id: int | None = Query(default=None, description="Return problems with a smaller id (keyset paging)"),
 ):
     query = db.query(Problem)
     if q:
         query = query.filter(Problem.title.ilike(f"%{q}%"))
+    if before_id is not None:
+        query = query.filter(Problem.id < before_id)
     return query.order_by(Problem.id.desc()).offset(offset).limit(limit).all()
 
 @router.get("/search", response_model=ProblemPage, summary="Search problems with filters and pagination")
+@cached("problems")
+@async_route
 def search_problems(
     db: Session = Depends(get_db),
     q: str | None = Query(default=None, description="Search in title or body"),
     domain: str | None = Query(default=None),
     difficulty: str | None = Query(default=None),
-    sort: str = Query(default="created_desc", description="created_desc|created_asc|title_asc"),
+    sort: str = Query(default="relevance", description="relevance|created_desc|created_asc|title_asc"),
     limit: int = Query(default=10, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description="next_cursor of the previous page; takes precedence over offset"),
 ):
+    if sort not in _SORTS and not (sort == "relevance" and q):
+        sort = "created_desc"
     query = db.query(Problem)
     if q:
-        pattern = f"%{q}%"
-        query = query.filter(or_(Problem.title.ilike(pattern), Problem.body.ilike(pattern)))
+        # the index orders the hits and picks the page; only the page's rows are read
+        search_index.refresh(db)
+        if sort == "relevance":
+            # ranks are recomputed per request, so the cursor is a position in the ranking
+            start = _decode_cursor(cursor, sort) if cursor else offset
+            total, hits = offload(search_index.search, q, domain, difficulty, top=start + limit)
+            ids = [pid for pid, _ in hits[start:]]
+            next_cursor = _encode_cursor(sort, start + limit) if start + limit < total else None
+        else:
+            col, asc = _SORTS[sort]
+            after = _decode_cursor(cursor, sort) if cursor else None
+            start = 0 if cursor else offset
+            total, ids = offload(search_index.search_sorted, q, domain, difficulty, col.key, asc, after, start + limit + 1)
+            more = len(ids) > start + limit
+            ids = ids[start:start + limit]
+        rows = {p.id: p for p in query.filter(Problem.id.in_(ids)).all()} if ids else {}
+        items = [rows[pid] for pid in ids if pid in rows]
+        if sort != "relevance":
+            next_cursor = _encode_cursor(sort, _sort_key(items[-1], sort)) if more and items else None
+        return ProblemPage(items=items, total=total, limit=limit, offset=start, next_cursor=next_cursor)
+
     if domain:
         query = query.filter(Problem.domain == domain)
     if difficulty:
         query = query.filter(Problem.difficulty == difficulty)
+    total = problem_counts.counts.get(db, domain, difficulty)
 
-    total = query.count()
-
-    if sort == "created_asc":
-        query = query.order_by(Problem.created_at.asc(), Problem.id.asc())
-    elif sort == "title_asc":
-        query = query.order_by(Problem.title.asc())
+    col, asc = _SORTS[sort]
+    if asc:
+        query = query.order_by(col.asc(), Problem.id.asc())
     else:
-        query = query.order_by(Problem.created_at.desc(), Problem.id.desc())
+        query = query.order_by(col.desc(), Problem.id.desc())
+    if cursor:
+        query = query.filter(_after(db, sort, _decode_cursor(cursor, sort)))
+        offset = 0
+    else:
+        query = query.offset(offset)
 
-    items = query.offset(offset).limit(limit).all()
-    return ProblemPage(items=items, total=total, limit=limit, offset=offset)
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = _encode_cursor(sort, _sort_key(items[-1], sort)) if len(rows) > limit else None
+    return ProblemPage(items=items, total=total, limit=limit, offset=offset, next_cursor=next_cursor)
 
 @router.post("", response_model=ProblemRead, summary="Create a problem",
              dependencies=[Depends(limit_dep("problems_create", *settings.RL_PROBLEMS_CREATE))])
@@ -62,14 +148,38 @@ def create_problem(payload: ProblemCreate, db: Session = Depends(get_db), curren
     existing = db.query(Problem).filter((Problem.title == payload.title) | (Problem.slug == payload.slug)).first()
     if existing:
         raise HTTPException(status_code=400, detail="Problem with same title or slug exists")
+    if (payload.sql_dataset is None) != (payload.reference_sql is None):
+        raise HTTPException(status_code=400, detail="SQL problems need both sql_dataset and reference_sql")
+    if payload.sql_dataset is not None:
+        if payload.sql_dataset not in sql_datasets.SPECS:
+            raise HTTPException(status_code=400, detail="Unknown SQL dataset")
+        try:
+            # also caches the reference digest before the first submission needs it
+            sql_judge.references.get(payload.sql_dataset, payload.reference_sql, payload.sql_float_tolerance)
+        except sql_engine.QueryError as e:
+            raise HTTPException(status_code=400, detail=f"Reference query failed: {e}")
     obj = Problem(
         title=payload.title,
         slug=payload.slug,
         body=payload.body,
         domain=payload.domain,
         difficulty=payload.difficulty,
+        sql_dataset=payload.sql_dataset,
+        reference_sql=payload.reference_sql,
+        sql_ordered=payload.sql_ordered,
+        sql_float_tolerance=payload.sql_float_tolerance,
     )
     db.add(obj)
     db.commit()
     db.refresh(obj)
+    problem_counts.counts.invalidate()
+    response_cache.invalidate("problems")
+    search_index.refresh(db)  # picks up obj and anything other workers created before it
     return obj
+
+@router.get("/{problem_id}/stats", response_model=ProblemStats, summary="Runtime and memory distribution of accepted submissions")
+@async_route
+def problem_stats(problem_id: int, db: Session = Depends(get_db)):
+    if not db.query(Problem.id).filter(Problem.id == problem_id).first():
+        raise HTTPException(status_code=404, detail="Problem not found")
+    return perf_index.summary(db, problem_id)
@@ -0,0 +1,36 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from ..schemas.sql import SqlDataset, SqlExport, SqlQuery, SqlResult
+from ..services import sql_engine
+from .auth import get_reader
+from ..core.ratelimit import limit_dep
+from ..core.config import Settings
+
+router = APIRouter(prefix="/sql", tags=["sql"])
+settings = Settings()
+
+@router.get("/datasets", response_model=List[SqlDataset], summary="List practice datasets and their tables")
+def list_datasets():
+    return sql_engine.list_datasets()
+
+@router.post("/run", response_model=SqlResult, summary="Run a read-only query against a dataset",
+             dependencies=[Depends(limit_dep("sql_run", *settings.RL_SQL_RUN))])
+def run_query(payload: SqlQuery, current_user = Depends(get_reader)):
+    try:
+        return sql_engine.run_query(payload.dataset, payload.sql, payload.limit, payload.cursor, payload.explain)
+    except sql_engine.UnknownDataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    except sql_engine.QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/export", summary="Stream every row of a query as NDJSON",
+             dependencies=[Depends(limit_dep("sql_export", *settings.RL_SQL_EXPORT))])
+def export_query(payload: SqlExport, current_user = Depends(get_reader)):
+    try:
+        lines = sql_engine.export_rows(payload.dataset, payload.sql)
+    except sql_engine.UnknownDataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    except sql_engine.QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
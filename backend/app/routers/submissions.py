@@ -1,105 +1,310 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-import difflib, re
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, load_only, undefer
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timedelta, timezone
+import asyncio, difflib, json, re, statistics
 
-from ..db.session import get_db
+from ..db.session import get_db, async_route, offload, SessionLocal
 from ..models.submission import Submission
+from ..models.submission_test import SubmissionTest
 from ..models.problem import Problem
-from ..models.testcase import TestCase
 from ..schemas.submission import (
     SubmissionCreate, SubmissionRead, SubmissionWithResults,
     SubmissionHead, SubmissionCode, DiffResponse, DiffSummary
 )
-from .auth import get_current_user
+from .auth import get_current_user, get_reader
 from ..services.runner import judge_python
+from ..services.sql_judge import judge_sql
+from ..services.judge_queue import Claimed, Job, QueueFull, queue as judge_queue
+from ..services import verdict_cache, testcase_bundles, perf_index, sql_engine, sql_judge
 from ..core.ratelimit import limit_dep
 from ..core.config import Settings
 
 router = APIRouter(prefix="/submissions", tags=["submissions"])
 settings = Settings()
 
-def _attempt_no(db: Session, user_id: int, problem_id: int, created_at) -> int:
-    earlier = db.query(Submission).filter(
-        and_(Submission.user_id == user_id,
-             Submission.problem_id == problem_id,
-             Submission.created_at <= created_at)
-    ).order_by(Submission.created_at.asc(), Submission.id.asc()).all()
-    for idx, s in enumerate(earlier, start=1):
-        if s.created_at == created_at and s.id == earlier[idx-1].id:
-            return idx
-    return len(earlier)
+def _insert(db: Session, sub: Submission) -> None:
+    """Adds `sub` with the next attempt number for its user and problem; the caller commits."""
+    for _ in range(5):
+        if sub.user_id is not None:
+            last = db.query(func.max(Submission.attempt_no)).filter(
+                Submission.user_id == sub.user_id,
+                Submission.problem_id == sub.problem_id,
+            ).scalar()
+            sub.attempt_no = (last or 0) + 1
+        try:
+            with db.begin_nested():
+                db.add(sub)
+            return
+        except IntegrityError:
+            pass  # a concurrent submission took this number
+    raise HTTPException(status_code=503, detail="Could not record the submission. Try again.")
 
-@router.post("", response_model=SubmissionWithResults, summary="Submit code for a problem",
-             dependencies=[Depends(limit_dep("submissions_create", *settings.RL_SUBMISSIONS_CREATE))])
-def create_submission(payload: SubmissionCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    problem = db.query(Problem).get(payload.problem_id)
-    if not problem:
-        raise HTTPException(status_code=404, detail="Problem not found")
+def _run_judge(code: str, tests: list, on_result=None):
+    return judge_python(
+        code=code,
+        tests=tests,
+        timeout_sec=settings.JUDGE_TIMEOUT_SEC,
+        parallel=settings.JUDGE_PARALLEL,
+        stop_on_failure=settings.JUDGE_STOP_ON_FIRST_FAILURE,
+        on_result=on_result,
+    )
 
-    tests = db.query(TestCase).filter(TestCase.problem_id == payload.problem_id).order_by(TestCase.id.asc()).all()
-    if not tests:
-        raise HTTPException(status_code=400, detail="No testcases configured for this problem")
+def _verdict_key(code: str, language: str, problem_id: int, fingerprint: str) -> str:
+    options = f"stop={int(settings.JUDGE_STOP_ON_FIRST_FAILURE)}"
+    return verdict_cache.make_key(code, language, settings.JUDGE_TIMEOUT_SEC, problem_id, fingerprint, options)
 
-    if payload.language != "python":
-        raise HTTPException(status_code=400, detail="Only python supported for now")
+def _remember(cache_key: str, problem_id: int, status: str, results: list[dict], total_ms: float) -> None:
+    # a TLE depends on host load at the time, not only on the code
+    if any(r["status"] == "TLE" for r in results):
+        return
+    verdict_cache.cache.put(cache_key, problem_id, status, results, total_ms)
 
-    status, results, total_ms = judge_python(
-        code=payload.code,
-        tests=[(t.input_text, t.expected_output) for t in tests],
-        timeout_sec=2.0
-    )
+def _present(results: list[dict], key: str) -> list:
+    return [r[key] for r in results if r.get(key) is not None]
 
-    passed = sum(1 for r in results if r["passed"])
-    sub = Submission(
-        problem_id=payload.problem_id,
-        user_id=current_user.id if current_user else None,
-        language=payload.language,
-        code=payload.code,
-        status=status,
-        runtime_ms=total_ms,
-        passed_count=passed,
-        total_count=len(results),
-    )
-    db.add(sub)
-    db.commit()
-    db.refresh(sub)
+def _apply_verdict(sub: Submission, status: str, results: list[dict], total_ms: float | None) -> None:
+    sub.status = status
+    sub.runtime_ms = total_ms
+    wall = _present(results, "runtime_ms")
+    cpu = _present(results, "cpu_ms")
+    mem = _present(results, "memory_kb")
+    sub.wall_ms_max = max(wall) if wall else None
+    sub.wall_ms_p50 = statistics.median(wall) if wall else None
+    sub.cpu_ms = sum(cpu) if cpu else None
+    sub.cpu_ms_max = max(cpu) if cpu else None
+    sub.cpu_ms_p50 = statistics.median(cpu) if cpu else None
+    sub.memory_kb = max(mem) if mem else None
+    sub.memory_kb_p50 = int(statistics.median(mem)) if mem else None
+    sub.passed_count = sum(1 for r in results if r["passed"])
+    sub.total_count = len(results)
+    sub.tests = [
+        SubmissionTest(
+            idx=r["idx"], status=r["status"], passed=r["passed"],
+            wall_ms=r.get("runtime_ms"), cpu_ms=r.get("cpu_ms"), memory_kb=r.get("memory_kb"),
+        )
+        for r in results
+    ]
+
+def _record_accepted(db: Session, sub: Submission) -> None:
+    if sub.status != "Accepted":
+        return
+    # one histogram entry per (user, problem), whether the verdict was judged or came
+    # from the verdict cache: only the user's first accepted submission counts
+    if db.query(Submission.id).filter(
+        Submission.user_id == sub.user_id,
+        Submission.problem_id == sub.problem_id,
+        Submission.status == "Accepted",
+        Submission.id != sub.id,
+    ).first():
+        return
+    perf_index.record(db, sub)
 
+def _rank(db: Session, sub: Submission) -> dict | None:
+    return perf_index.rank(db, sub) if sub.status == "Accepted" else None
+
+def _submission_payload(sub: Submission, results: list[dict], rank: dict | None = None) -> dict:
     return {
         "id": sub.id,
         "problem_id": sub.problem_id,
         "user_id": sub.user_id,
+        "attempt_no": sub.attempt_no,
         "language": sub.language,
         "status": sub.status,
         "runtime_ms": sub.runtime_ms,
+        "cpu_ms": sub.cpu_ms,
+        "memory_kb": sub.memory_kb,
+        "metrics": sub.metrics,
         "passed_count": sub.passed_count,
         "total_count": sub.total_count,
         "created_at": sub.created_at,
         "results": results,
+        "rank": rank,
     }
 
+def _judge_for(db: Session, problem: Problem, language: str, code: str):
+    """(total tests, fingerprint, judge) for `code`; judge(on_result) returns the verdict."""
+    if language == "sql":
+        if not problem.reference_sql:
+            raise HTTPException(status_code=400, detail="This problem has no SQL reference query")
+        # plain values: queued jobs judge after this request's session is gone
+        sql_args = (problem.sql_dataset, problem.reference_sql, problem.sql_ordered, problem.sql_float_tolerance)
+        def judge(on_result=None):
+            return judge_sql(code, *sql_args, on_result=on_result)
+        return 1, sql_judge.fingerprint(*sql_args), judge
+    bundle = testcase_bundles.cache.get(db, problem.id, problem.testcase_version)
+    if not bundle.tests:
+        raise HTTPException(status_code=400, detail="No testcases configured for this problem")
+    tests = list(bundle.tests)
+    def judge(on_result=None):
+        return _run_judge(code, tests, on_result=on_result)
+    return len(tests), f"v{bundle.version}", judge
+
+# statuses of a submission that still has to be judged
+_PENDING = ("Queued", "Running")
+
+def _claim(db: Session, submission_id: int) -> bool:
+    """Moves the row from Queued to Running; False when another process got there first."""
+    taken = db.query(Submission).filter(
+        Submission.id == submission_id, Submission.status == "Queued",
+    ).update({"status": "Running", "claimed_at": datetime.now(timezone.utc)}, synchronize_session=False)
+    db.commit()
+    return taken == 1
+
+def _queued_job(submission_id: int, total: int, judge, cache_key: str) -> Job:
+    def run(job: Job) -> dict:
+        # runs on a queue thread, so it needs its own session
+        db = SessionLocal()
+        try:
+            if not _claim(db, submission_id):
+                raise Claimed()
+            sub = db.get(Submission, submission_id)
+            try:
+                status, results, total_ms = judge(on_result=job.publish)
+            except Exception:
+                _apply_verdict(sub, "Judge Error", [], None)
+                db.commit()
+                raise
+            _apply_verdict(sub, status, results, total_ms)
+            _record_accepted(db, sub)
+            db.commit()
+            _remember(cache_key, sub.problem_id, status, results, total_ms)
+            return {
+                "status": sub.status,
+                "runtime_ms": sub.runtime_ms,
+                "cpu_ms": sub.cpu_ms,
+                "memory_kb": sub.memory_kb,
+                "metrics": sub.metrics,
+                "passed_count": sub.passed_count,
+                "total_count": sub.total_count,
+                "results": results,
+                "rank": _rank(db, sub),
+            }
+        finally:
+            db.close()
+    return Job(submission_id, total, run)
+
+def resume_queued() -> int:
+    """
+    Queues again the submissions a previous run of the app left Queued, and those
+    whose judge died mid-run (Running, claimed over JUDGE_CLAIM_TIMEOUT_SEC ago).
+    Every worker process calls it at startup; the claim in _queued_job makes sure
+    each is judged once. Returns the number of jobs queued here.
+    """
+    db = SessionLocal()
+    try:
+        stale = datetime.now(timezone.utc) - timedelta(seconds=settings.JUDGE_CLAIM_TIMEOUT_SEC)
+        db.query(Submission).filter(Submission.status == "Running", Submission.claimed_at < stale).update(
+            {"status": "Queued"}, synchronize_session=False)
+        db.commit()
+        subs = db.query(Submission).options(undefer(Submission.code)).filter(
+            Submission.status == "Queued").order_by(Submission.id).all()
+        for sub in subs:
+            problem = db.get(Problem, sub.problem_id)
+            try:
+                total, fingerprint, judge = _judge_for(db, problem, sub.language, sub.code)
+            except HTTPException:  # the problem changed since it was submitted
+                _apply_verdict(sub, "Judge Error", [], None)
+                db.commit()
+                continue
+            cache_key = _verdict_key(sub.code, sub.language, sub.problem_id, fingerprint)
+            judge_queue.submit(_queued_job(sub.id, total, judge, cache_key), enforce_depth=False)
+        return len(subs)
+    finally:
+        db.close()
+
+@router.post("", response_model=SubmissionWithResults, summary="Submit code for a problem",
+             dependencies=[Depends(limit_dep("submissions_create", *settings.RL_SUBMISSIONS_CREATE))])
+def create_submission(
+    payload: SubmissionCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+    wait: bool = Query(default=True, description="Judge before responding; false queues the run and returns at once"),
+):
+    problem = db.query(Problem).get(payload.problem_id)
+    if not problem:
+        raise HTTPException(status_code=404, detail="Problem not found")
+
+    total, fingerprint, judge = _judge_for(db, problem, payload.language, payload.code)
+    sub = Submission(
+        problem_id=payload.problem_id,
+        user_id=current_user.id if current_user else None,
+        language=payload.language,
+        code=payload.code,
+    )
+    cache_key = _verdict_key(payload.code, payload.language, payload.problem_id, fingerprint)
+    cached = verdict_cache.cache.get(cache_key)
+    if cached is not None:
+        status, results, total_ms = cached
+        _apply_verdict(sub, status, results, total_ms)
+        _insert(db, sub)
+        _record_accepted(db, sub)
+        db.commit()
+        db.refresh(sub)
+        return _submission_payload(sub, results, _rank(db, sub))
+
+    if not wait:
+        _apply_verdict(sub, "Queued", [], None)
+        sub.total_count = total
+        _insert(db, sub)
+        db.commit()
+        db.refresh(sub)
+        try:
+            judge_queue.submit(_queued_job(sub.id, total, judge, cache_key))
+        except QueueFull:
+            db.delete(sub)
+            db.commit()
+            raise HTTPException(status_code=503, detail="Judge queue is full. Try again later.")
+        response.status_code = 202
+        return _submission_payload(sub, [])
+
+    try:
+        status, results, total_ms = judge()
+    except sql_engine.QueryError as e:  # the reference query, not the submission
+        raise HTTPException(status_code=500, detail=f"Reference query failed: {e}")
+    _apply_verdict(sub, status, results, total_ms)
+    _insert(db, sub)
+    _record_accepted(db, sub)
+    db.commit()
+    db.refresh(sub)
+    _remember(cache_key, sub.problem_id, status, results, total_ms)
+    return _submission_payload(sub, results, _rank(db, sub))
+
 @router.get("", response_model=List[SubmissionRead], summary="List my submissions for a problem or all")
+@async_route
 def list_submissions(
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+    current_user = Depends(get_reader),
     problem_id: int | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    before_id: int | None = Query(default=None, description="Return submissions older than this id (keyset paging)"),
 ):
     q = db.query(Submission).filter(Submission.user_id == current_user.id)
     if problem_id is not None:
         q = q.filter(Submission.problem_id == problem_id)
-    return q.order_by(Submission.id.desc()).all()
+    if before_id is not None:
+        q = q.filter(Submission.id < before_id)
+    return q.order_by(Submission.id.desc()).limit(limit).all()
 
 @router.get("/history", response_model=List[SubmissionHead], summary="List my submission history with attempt numbers")
+@async_route
 def list_history(
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+    current_user = Depends(get_reader),
     problem_id: int = Query(...),
 ):
-    subs = db.query(Submission).filter(
+    subs = db.query(Submission).options(load_only(
+        Submission.id, Submission.problem_id, Submission.status, Submission.passed_count,
+        Submission.total_count, Submission.created_at, Submission.attempt_no,
+    )).filter(
         Submission.user_id == current_user.id,
         Submission.problem_id == problem_id
-    ).order_by(Submission.created_at.asc(), Submission.id.asc()).all()
+    ).order_by(Submission.attempt_no.asc()).all()
     return [
         SubmissionHead(
             id=s.id,
@@ -108,13 +313,14 @@ def list_history(
             passed_count=s.passed_count,
             total_count=s.total_count,
             created_at=s.created_at,
-            attempt_no=idx
-        ) for idx, s in enumerate(subs, start=1)
+            attempt_no=s.attempt_no
+        ) for s in subs
     ]
 
 @router.get("/{submission_id}/code", response_model=SubmissionCode, summary="Get code for one submission")
-def get_code(submission_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    sub = db.query(Submission).get(submission_id)
+@async_route
+def get_code(submission_id: int, db: Session = Depends(get_db), current_user = Depends(get_reader)):
+    sub = db.get(Submission, submission_id, options=[undefer(Submission.code)])
     if not sub or sub.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Not found")
     return SubmissionCode(id=sub.id, problem_id=sub.problem_id, code=sub.code)
@@ -156,46 +362,50 @@ def _semantic_summary_from_diff(diff_lines: list[str]) -> DiffSummary:
         changed_identifiers=changed
     )
 
+def _diff(old_code: str | None, new_code: str | None, old_id: int, new_id: int) -> tuple[list[str], DiffSummary]:
+    diff_lines = list(difflib.unified_diff(
+        (old_code or "").splitlines(), (new_code or "").splitlines(),
+        fromfile=f"old_{old_id}.py",
+        tofile=f"new_{new_id}.py",
+        lineterm="",
+        n=3
+    ))
+    return diff_lines, _semantic_summary_from_diff(diff_lines)
+
 @router.get("/diff", response_model=DiffResponse, summary="Diff two submissions of the same problem")
+@async_route
 def diff_submissions(
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+    current_user = Depends(get_reader),
     problem_id: int = Query(...),
     new_id: Optional[int] = Query(None),
     old_id: Optional[int] = Query(None),
 ):
-    subs = db.query(Submission).filter(
+    attempts = db.query(Submission.id, Submission.attempt_no).filter(
         Submission.user_id == current_user.id,
         Submission.problem_id == problem_id
-    ).order_by(Submission.created_at.asc(), Submission.id.asc()).all()
-
-    if not subs or len(subs) < 2:
+    )
+    if len(attempts.limit(2).all()) < 2:
         raise HTTPException(status_code=400, detail="Not enough submissions to diff")
 
-    sub_map = {s.id: s for s in subs}
-    new = sub_map.get(new_id) if new_id else subs[-1]
-    if not new:
-        raise HTTPException(status_code=404, detail="new_id not found")
+    if new_id:
+        new = attempts.filter(Submission.id == new_id).first()
+        if not new:
+            raise HTTPException(status_code=404, detail="new_id not found")
+    else:
+        new = attempts.order_by(Submission.attempt_no.desc()).first()
     if old_id is None:
-        pos = subs.index(new)
-        if pos == 0:
+        old = attempts.filter(Submission.attempt_no < new.attempt_no).order_by(Submission.attempt_no.desc()).first()
+        if not old:
             raise HTTPException(status_code=400, detail="No previous attempt to compare")
-        old = subs[pos - 1]
     else:
-        old = sub_map.get(old_id)
+        old = attempts.filter(Submission.id == old_id).first()
         if not old:
             raise HTTPException(status_code=404, detail="old_id not found")
 
-    old_lines = (old.code or "").splitlines()
-    new_lines = (new.code or "").splitlines()
-    diff_lines = list(difflib.unified_diff(
-        old_lines, new_lines,
-        fromfile=f"old_{old.id}.py",
-        tofile=f"new_{new.id}.py",
-        lineterm="",
-        n=3
-    ))
-    summary = _semantic_summary_from_diff(diff_lines)
+    # only the two blobs being compared are read
+    code = dict(db.query(Submission.id, Submission.code).filter(Submission.id.in_((old.id, new.id))).all())
+    diff_lines, summary = offload(_diff, code[old.id], code[new.id], old.id, new.id)
     return {
         "problem_id": problem_id,
         "new_id": new.id,
@@ -203,3 +413,89 @@ def diff_submissions(
         "summary": summary,
         "unified_diff": "\n".join(diff_lines)
     }
+
+def _owned_submission(db: Session, submission_id: int, user) -> Submission:
+    sub = db.query(Submission).get(submission_id)
+    if not sub or sub.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Not found")
+    return sub
+
+@router.get("/{submission_id}", response_model=SubmissionWithResults, summary="Get a submission and its judging progress")
+def get_submission(submission_id: int, db: Session = Depends(get_db), current_user = Depends(get_reader)):
+    sub = _owned_submission(db, submission_id, current_user)
+    job = judge_queue.get(sub.id)
+    if job is None:
+        stored = [
+            {"idx": t.idx, "passed": t.passed, "status": t.status,
+             "runtime_ms": t.wall_ms, "cpu_ms": t.cpu_ms, "memory_kb": t.memory_kb}
+            for t in sub.tests
+        ]
+        return _submission_payload(sub, stored, _rank(db, sub))
+    if job.summary is not None:
+        out = _submission_payload(sub, job.summary.get("results", []))
+        out.update({k: v for k, v in job.summary.items() if k != "results"})
+        return out
+    out = _submission_payload(sub, sorted(job.results, key=lambda r: r["idx"]))
+    out["status"] = job.status
+    return out
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _final(sub: Submission) -> dict:
+    return {
+        "status": sub.status,
+        "runtime_ms": sub.runtime_ms,
+        "cpu_ms": sub.cpu_ms,
+        "memory_kb": sub.memory_kb,
+        "metrics": sub.metrics,
+        "passed_count": sub.passed_count,
+        "total_count": sub.total_count,
+    }
+
+def _read_final(submission_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        return _final(db.get(Submission, submission_id))
+    finally:
+        db.close()
+
+# how often a stream re-reads a submission that is judged by another process
+_POLL_SEC = 0.5
+_KEEP_ALIVE_SEC = 15.0
+
+@router.get("/{submission_id}/events", summary="Stream test results as server-sent events")
+def stream_submission(submission_id: int, db: Session = Depends(get_db), current_user = Depends(get_reader)):
+    sub = _owned_submission(db, submission_id, current_user)
+    job = judge_queue.get(sub.id)
+    final = _final(sub)
+
+    async def events():
+        # async, so a waiting client holds no threadpool thread
+        if job is not None:
+            seen = 0
+            while True:
+                new, done = await job.wait_events(seen, timeout=_KEEP_ALIVE_SEC)
+                for r in new:
+                    yield _sse("result", r)
+                seen += len(new)
+                if done:
+                    break
+                if not new:
+                    yield ": keep-alive\n\n"
+            if job.summary is not None:
+                yield _sse("done", {k: v for k, v in job.summary.items() if k != "results"})
+                return
+        # queued in another worker process (or claimed by one): follow the row
+        summary = final if job is None else await run_in_threadpool(_read_final, submission_id)
+        quiet = 0.0
+        while summary["status"] in _PENDING:
+            await asyncio.sleep(_POLL_SEC)
+            summary = await run_in_threadpool(_read_final, submission_id)
+            quiet += _POLL_SEC
+            if quiet >= _KEEP_ALIVE_SEC:
+                yield ": keep-alive\n\n"
+                quiet = 0.0
+        yield _sse("done", summary)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -7,9 +7,11 @@ from ..models.problem import Problem
 from ..schemas.testcase import TestCaseCreate, TestCaseRead
 from .auth import get_current_user
 from ..core.ratelimit import limit_dep
+from ..services import verdict_cache, testcase_bundles
+from ..services.response_cache import CachedRoute, cache as response_cache, cached
 from ..core.config import Settings
 
-router = APIRouter(prefix="/testcases", tags=["testcases"])
+router = APIRouter(prefix="/testcases", tags=["testcases"], route_class=CachedRoute)
 settings = Settings()
 
 @router.post("", response_model=TestCaseRead, summary="Create a testcase for a problem",
@@ -20,10 +22,17 @@ def create_testcase(payload: TestCaseCreate, db: Session = Depends(get_db), curr
         raise HTTPException(status_code=404, detail="Problem not found")
     tc = TestCase(problem_id=payload.problem_id, input_text=payload.input_text, expected_output=payload.expected_output)
     db.add(tc)
+    db.query(Problem).filter(Problem.id == payload.problem_id).update(
+        {Problem.testcase_version: Problem.testcase_version + 1}, synchronize_session=False
+    )
     db.commit()
     db.refresh(tc)
+    testcase_bundles.cache.invalidate(payload.problem_id)
+    verdict_cache.cache.invalidate_problem(payload.problem_id)
+    response_cache.invalidate(f"testcases:{payload.problem_id}")
     return tc
 
 @router.get("/{problem_id}", response_model=List[TestCaseRead], summary="List testcases for a problem")
+@cached("testcases:{problem_id}")
 def list_testcases(problem_id: int, db: Session = Depends(get_db)):
     return db.query(TestCase).filter(TestCase.problem_id == problem_id).order_by(TestCase.id.asc()).all()
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from ..db.session import get_db
 from ..schemas.user import UserRead
 from ..models.user import User
+from ..core import auth_cache
 from .auth import get_current_user
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -8,3 +11,9 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.get("/me", response_model=UserRead, summary="Get current user")
 def read_me(current_user: User = Depends(get_current_user)):
     return current_user
+
+@router.delete("/me", status_code=204, summary="Deactivate my account")
+def deactivate_me(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    db.query(User).filter(User.id == current_user.id).update({User.is_active: False})
+    db.commit()
+    auth_cache.invalidate_user(current_user.id, deactivate=True)
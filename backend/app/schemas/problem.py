@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class ProblemBase(BaseModel):
     title: str
@@ -7,9 +7,12 @@ class ProblemBase(BaseModel):
     body: str
     domain: str
     difficulty: str
+    sql_dataset: Optional[str] = None  # set for SQL problems
+    sql_ordered: bool = False  # row order must match the reference
+    sql_float_tolerance: float = Field(default=0.0, ge=0)
 
 class ProblemCreate(ProblemBase):
-    pass
+    reference_sql: Optional[str] = Field(default=None, max_length=20000)  # never returned
 
 class ProblemRead(ProblemBase):
     id: int
@@ -21,3 +24,19 @@ class ProblemPage(BaseModel):
     total: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = None  # opaque; pass back as `cursor` for the next page
+
+class PerfBucket(BaseModel):
+    le: Optional[float]  # upper bound; None for the open-ended last bucket
+    count: int
+
+class PerfDistribution(BaseModel):
+    p50: Optional[float]
+    p90: Optional[float]
+    histogram: List[PerfBucket]
+
+class ProblemStats(BaseModel):
+    problem_id: int
+    accepted: int
+    runtime_ms: PerfDistribution
+    memory_kb: PerfDistribution
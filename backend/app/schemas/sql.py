@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class SqlColumn(BaseModel):
+    cid: int
+    name: str
+    type: str
+    notnull: int
+
+class SqlDataset(BaseModel):
+    name: str
+    description: str
+    version: str
+    ready: bool  # False while a generated dataset is still being built
+    tables: List[str]
+    # "schema" would shadow BaseModel.schema
+    table_schema: Dict[str, List[SqlColumn]] = Field(alias="schema")
+
+class SqlExport(BaseModel):
+    dataset: str
+    sql: str = Field(max_length=20000)
+
+class SqlQuery(SqlExport):
+    limit: int = Field(default=500, ge=1, le=1000)
+    cursor: Optional[str] = None  # next_cursor of the previous page
+    explain: bool = False  # include the query plan
+
+class SqlResult(BaseModel):
+    columns: List[str]
+    rows: List[List[Any]]
+    english: str
+    plan: List[str]
+    row_count: int
+    truncated: bool  # more rows follow; fetch them with next_cursor
+    next_cursor: Optional[str] = None
+    cached: bool = False  # served from the result cache
+    elapsed_ms: float
@@ -9,19 +9,35 @@ class TestResult(BaseModel):
     stdout: str = ""
     stderr: str = ""
     runtime_ms: float | None = None
+    cpu_ms: float | None = None
+    memory_kb: int | None = None
+
+class MetricSummary(BaseModel):
+    max: float | None = None
+    p50: float | None = None
+    sum: float | None = None
+
+class SubmissionMetrics(BaseModel):
+    wall_ms: MetricSummary
+    cpu_ms: MetricSummary
+    memory_kb: MetricSummary
 
 class SubmissionCreate(BaseModel):
     problem_id: int
-    language: str = Field(pattern=r"^(python)$")
+    language: str = Field(pattern=r"^(python|sql)$")
     code: str
 
 class SubmissionRead(BaseModel):
     id: int
     problem_id: int
     user_id: int | None
+    attempt_no: int | None = None
     language: str
     status: str
     runtime_ms: float | None = None
+    cpu_ms: float | None = None
+    memory_kb: int | None = None
+    metrics: SubmissionMetrics | None = None
     passed_count: int
     total_count: int
     created_at: datetime
@@ -29,8 +45,15 @@ class SubmissionRead(BaseModel):
     class Config:
         from_attributes = True
 
+class SubmissionRank(BaseModel):
+    # percent of other accepted submissions to the problem that this one beats
+    runtime_beats: float | None = None
+    memory_beats: float | None = None
+    accepted: int
+
 class SubmissionWithResults(SubmissionRead):
     results: List[TestResult]
+    rank: SubmissionRank | None = None
 
 # For history list with attempt numbers
 class SubmissionHead(BaseModel):
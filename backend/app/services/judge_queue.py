@@ -0,0 +1,185 @@
+# backend/app/services/judge_queue.py
+#
+# In-process judging queue: submissions are enqueued by the API and judged by a
+# small set of background threads. Jobs keep their per-test results in memory so
+# clients can poll or stream them while the run is in progress.
+#
+# The submission rows are what is durable: a job claims its row before judging
+# (see routers.submissions), so rows left queued by a restart can be queued again
+# by every worker process at startup and are still judged once.
+import asyncio, threading, time
+from collections import OrderedDict, deque
+from typing import Callable, Optional
+
+from ..core.config import Settings
+
+settings = Settings()
+
+class QueueFull(Exception):
+    pass
+
+class Claimed(Exception):
+    """Raised by a job's fn when another process has already taken its submission."""
+
+class Job:
+    def __init__(self, submission_id: int, total: int, fn: Callable[["Job"], dict]):
+        self.submission_id = submission_id
+        self.total = total
+        self.fn = fn
+        self.status = "Queued"
+        self.results: list[dict] = []
+        self.summary: Optional[dict] = None
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def _notify(self) -> None:
+        # called with _cond held, from a queue thread
+        self._cond.notify_all()
+        for loop, fut in self._waiters:
+            loop.call_soon_threadsafe(_wake, fut)
+        self._waiters.clear()
+
+    def publish(self, result: dict) -> None:
+        with self._cond:
+            self.results.append(result)
+            self._notify()
+
+    def _start(self) -> None:
+        with self._cond:
+            self.status = "Running"
+            self.started_at = time.monotonic()
+            self._notify()
+
+    def _finish(self, summary: Optional[dict]) -> None:
+        """`summary` is None when the job was claimed elsewhere and never ran here."""
+        with self._cond:
+            self.summary = summary
+            if summary is not None:
+                self.status = summary["status"]
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    async def wait_events(self, seen: int, timeout: float) -> tuple[list[dict], bool]:
+        """Waits, without holding a thread, until there are results past `seen` or the
+        job is done; returns (new results, done)."""
+        with self._cond:
+            if len(self.results) <= seen and not self.done:
+                fut = asyncio.get_running_loop().create_future()
+                self._waiters.append((fut.get_loop(), fut))
+            else:
+                fut = None
+        if fut is not None:
+            try:
+                await asyncio.wait_for(fut, timeout)
+            except asyncio.TimeoutError:
+                with self._cond:
+                    self._waiters = [w for w in self._waiters if w[1] is not fut]
+        with self._cond:
+            return self.results[seen:], self.done
+
+def _wake(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+class JobQueue:
+    def __init__(self, workers: int, max_depth: int, keep_finished: int = 1000):
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.keep_finished = keep_finished
+        self._pending: deque[Job] = deque()
+        self._jobs: "OrderedDict[int, Job]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._claimed_elsewhere = 0
+        self._waits_ms: deque[float] = deque(maxlen=256)
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"judge-queue-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, job: Job, enforce_depth: bool = True) -> Job:
+        """Queues `job`; rows queued again at startup skip the depth check, they were
+        admitted when they were submitted."""
+        with self._cond:
+            if enforce_depth and len(self._pending) >= self.max_depth:
+                raise QueueFull()
+            self._ensure_started()
+            self._pending.append(job)
+            self._jobs[job.submission_id] = job
+            self._cond.notify()
+        return job
+
+    def get(self, submission_id: int) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(submission_id)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                self._running += 1
+            job._start()
+            self._waits_ms.append((job.started_at - job.enqueued_at) * 1000.0)
+            elsewhere = failed = False
+            try:
+                summary = job.fn(job)
+            except Claimed:
+                summary = None
+                elsewhere = True
+            except Exception as e:
+                summary = {"status": "Judge Error", "detail": str(e)}
+                failed = True
+            job._finish(summary)
+            with self._cond:
+                self._running -= 1
+                if elsewhere:
+                    # readers go to the submission row instead
+                    if self._jobs.get(job.submission_id) is job:
+                        del self._jobs[job.submission_id]
+                    self._claimed_elsewhere += 1
+                else:
+                    self._completed += 1
+                self._failed += failed
+                self._evict()
+
+    def _evict(self) -> None:
+        # keep only the most recent finished jobs around for polling
+        finished = [sid for sid, j in self._jobs.items() if j.done]
+        for sid in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[sid]
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            waits = list(self._waits_ms)
+            oldest = (now - self._pending[0].enqueued_at) * 1000.0 if self._pending else 0.0
+            return {
+                "depth": len(self._pending),
+                "max_depth": self.max_depth,
+                "running": self._running,
+                "workers": self.workers,
+                "completed": self._completed,
+                "failed": self._failed,
+                "claimed_elsewhere": self._claimed_elsewhere,
+                "oldest_wait_ms": oldest,
+                "wait_ms_avg": sum(waits) / len(waits) if waits else 0.0,
+                "wait_ms_max": max(waits) if waits else 0.0,
+            }
+
+queue = JobQueue(settings.JUDGE_QUEUE_WORKERS, settings.JUDGE_QUEUE_MAX_DEPTH)
@@ -0,0 +1,122 @@
+# backend/app/services/perf_index.py
+#
+# Per-problem percentile index over accepted submissions. Each metric is a fixed
+# log-scale histogram (problem_perf_buckets), bumped by one row update per accepted
+# submission, so ranking reads a bounded number of rows however many submissions exist.
+import math, threading, time
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings
+from ..models.perf_bucket import ProblemPerfBucket
+
+settings = Settings()
+
+BUCKETS = 64
+# metric -> (lower bound of bucket 1, growth factor per bucket)
+SCALES = {
+    "runtime_ms": (0.1, 1.25),     # 0.1ms .. ~2min
+    "memory_kb": (1024.0, 1.15),   # 1MB .. ~6GB
+}
+
+def bucket_of(metric: str, value: float) -> int:
+    lo, growth = SCALES[metric]
+    if value < lo:
+        return 0
+    return min(BUCKETS - 1, 1 + int(math.log(value / lo, growth)))
+
+def upper_bound(metric: str, bucket: int) -> float | None:
+    lo, growth = SCALES[metric]
+    if bucket >= BUCKETS - 1:
+        return None
+    return lo * growth ** bucket
+
+def submission_values(sub) -> dict[str, float]:
+    # CPU time is the stable measure; wall time is only a fallback
+    runtime = sub.cpu_ms if sub.cpu_ms is not None else sub.runtime_ms
+    out = {}
+    if runtime is not None:
+        out["runtime_ms"] = runtime
+    if sub.memory_kb is not None:
+        out["memory_kb"] = float(sub.memory_kb)
+    return out
+
+_cache: dict[int, tuple[float, dict[str, list[int]]]] = {}
+_cache_lock = threading.Lock()
+
+def _bump(db: Session, problem_id: int, metric: str, bucket: int) -> None:
+    key = dict(problem_id=problem_id, metric=metric, bucket=bucket)
+    q = db.query(ProblemPerfBucket).filter_by(**key)
+    if q.update({ProblemPerfBucket.count: ProblemPerfBucket.count + 1}, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(ProblemPerfBucket(count=1, **key))
+    except IntegrityError:
+        # another request created the bucket first
+        q.update({ProblemPerfBucket.count: ProblemPerfBucket.count + 1}, synchronize_session=False)
+
+def record(db: Session, sub) -> None:
+    """Adds an accepted submission to its problem's histograms; the caller commits."""
+    for metric, value in submission_values(sub).items():
+        _bump(db, sub.problem_id, metric, bucket_of(metric, value))
+    with _cache_lock:
+        _cache.pop(sub.problem_id, None)
+
+def histograms(db: Session, problem_id: int) -> dict[str, list[int]]:
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(problem_id)
+        if hit and now - hit[0] < settings.PERF_INDEX_TTL_SEC:
+            return hit[1]
+    hist = {m: [0] * BUCKETS for m in SCALES}
+    rows = db.query(ProblemPerfBucket.metric, ProblemPerfBucket.bucket, ProblemPerfBucket.count).filter(
+        ProblemPerfBucket.problem_id == problem_id
+    ).all()
+    for metric, bucket, count in rows:
+        if metric in hist and 0 <= bucket < BUCKETS:
+            hist[metric][bucket] = count
+    with _cache_lock:
+        _cache[problem_id] = (now, hist)
+    return hist
+
+def beats(counts: list[int], bucket: int) -> float | None:
+    """Percent of the other accepted submissions that score worse (higher) than `bucket`."""
+    total = sum(counts)
+    others = total - 1
+    if others <= 0:
+        return None
+    worse = sum(counts[bucket + 1:]) + max(0, counts[bucket] - 1) / 2  # ties split evenly
+    return round(100.0 * worse / others, 1)
+
+def rank(db: Session, sub) -> dict:
+    hist = histograms(db, sub.problem_id)
+    values = submission_values(sub)
+    out = {"accepted": sum(hist["runtime_ms"])}
+    for metric, key in (("runtime_ms", "runtime_beats"), ("memory_kb", "memory_beats")):
+        v = values.get(metric)
+        out[key] = beats(hist[metric], bucket_of(metric, v)) if v is not None else None
+    return out
+
+def _quantile(metric: str, counts: list[int], q: float) -> float | None:
+    total = sum(counts)
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for b, n in enumerate(counts):
+        seen += n
+        if seen >= target:
+            return upper_bound(metric, b) or upper_bound(metric, b - 1)
+    return None
+
+def summary(db: Session, problem_id: int) -> dict:
+    hist = histograms(db, problem_id)
+    out = {"problem_id": problem_id, "accepted": sum(hist["runtime_ms"])}
+    for metric, counts in hist.items():
+        out[metric] = {
+            "p50": _quantile(metric, counts, 0.5),
+            "p90": _quantile(metric, counts, 0.9),
+            "histogram": [{"le": upper_bound(metric, b), "count": n} for b, n in enumerate(counts) if n],
+        }
+    return out
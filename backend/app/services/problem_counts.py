@@ -0,0 +1,58 @@
+# backend/app/services/problem_counts.py
+#
+# Cached problem totals per (domain, difficulty) filter, so paging through a large
+# catalog does not run COUNT(*) on every page. Local creates invalidate the cache;
+# the TTL bounds how long creates made by other workers go unnoticed.
+import threading, time
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings
+from ..models.problem import Problem
+
+settings = Settings()
+
+class CountCache:
+    def __init__(self, ttl_sec: float):
+        self.ttl_sec = ttl_sec
+        self._data: dict[tuple, tuple[float, int]] = {}  # (domain, difficulty) -> (expires, total)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, domain: Optional[str], difficulty: Optional[str]) -> int:
+        key = (domain or None, difficulty or None)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        query = db.query(func.count(Problem.id))
+        if domain:
+            query = query.filter(Problem.domain == domain)
+        if difficulty:
+            query = query.filter(Problem.difficulty == difficulty)
+        total = query.scalar() or 0
+        with self._lock:
+            self._data[key] = (now + self.ttl_sec, total)
+        return total
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+counts = CountCache(settings.PROBLEM_COUNT_TTL_SEC)
@@ -0,0 +1,136 @@
+# backend/app/services/response_cache.py
+#
+# Rendered JSON bodies of read-mostly GET routes, keyed by namespace version, path
+# and sorted query string, served with strong ETags so clients can revalidate with
+# If-None-Match and get an empty 304. Writers bump their namespace's version, which
+# orphans every older entry at once; the TTL bounds how long writes made by other
+# workers go unnoticed.
+import hashlib, threading, time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from ..core.config import Settings
+
+settings = Settings()
+
+class Entry(NamedTuple):
+    expires: float
+    body: bytes
+    media_type: str
+    etag: str
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    # weak comparison, as If-None-Match requires; compressed responses carry W/ tags
+    if not if_none_match:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(","))
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, ttl_sec: float):
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[tuple, Entry]" = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def key(self, namespace: str, request: Request) -> tuple:
+        query = tuple(sorted(request.query_params.multi_items()))
+        with self._lock:
+            return namespace, self._versions.get(namespace, 0), request.url.path, query
+
+    def get(self, key: tuple) -> Optional[Entry]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.expires <= now:
+                if entry is not None:
+                    self._bytes -= len(self._data.pop(key).body)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, body: bytes, media_type: str) -> Entry:
+        entry = Entry(time.monotonic() + self.ttl_sec, body, media_type, make_etag(body))
+        if self.ttl_sec <= 0 or len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if key[1] != self._versions.get(key[0], 0):
+                return entry  # invalidated while this body was being rendered
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._data[key] = entry
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            stale = [k for k in self._data if k[0] == namespace]
+            for k in stale:
+                self._bytes -= len(self._data.pop(k).body)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+cache = ResponseCache(settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_TTL_SEC)
+
+def cached(namespace: str):
+    """Marks a GET endpoint for caching under `namespace`, which may name path
+    parameters (e.g. "testcases:{problem_id}"). Takes effect on routers built with
+    `route_class=CachedRoute`; the endpoint must not depend on who is asking."""
+    def mark(fn):
+        fn.response_cache_namespace = namespace
+        return fn
+    return mark
+
+class CachedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        namespace = getattr(self.endpoint, "response_cache_namespace", None)
+        if namespace is None or self.methods != {"GET"}:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            key = cache.key(namespace.format(**request.path_params), request)
+            entry = cache.get(key)
+            if entry is None:
+                response = await handler(request)
+                if response.status_code != 200 or not isinstance(getattr(response, "body", None), bytes):
+                    return response
+                entry = cache.put(key, response.body, response.media_type)
+            headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+            if _matches(request.headers.get("if-none-match"), entry.etag):
+                cache.not_modified += 1
+                return Response(status_code=304, headers=headers)
+            return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+        return cached_handler
@@ -0,0 +1,82 @@
+# backend/app/services/run_uids.py
+#
+# Unprivileged uids for judge runs, one per concurrent run. RLIMIT_NPROC counts
+# every process and thread of a uid, so with a shared uid concurrent runs would
+# share one budget; with a uid each, JUDGE_MAX_PROCS is a per-run allowance.
+# Every uvicorn worker has its own pool over the same range, so a uid is held
+# with flock on a lock file as well: the lock is what makes it free or taken.
+# Only used when runs actually drop their uid (the judge is root).
+import os, tempfile, threading, time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
+try:
+    import fcntl
+except ImportError:  # not on Windows, where runs never drop their uid
+    fcntl = None
+
+from ..core.config import Settings
+
+settings = Settings()
+
+class UidPool:
+    def __init__(self, first: int, count: int, lock_dir: str):
+        self.first = first
+        self.count = max(1, count)
+        self.lock_dir = lock_dir
+        self._fds: list[int] = []
+        self._free: deque[int] = deque(range(self.count))
+        self._lock = threading.Lock()
+        self.leases = 0
+        self.waits = 0
+
+    def _open(self) -> None:
+        # root-only, so runs cannot take or hold the locks themselves
+        os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+        os.chown(self.lock_dir, os.geteuid(), os.getegid())
+        os.chmod(self.lock_dir, 0o700)
+        self._fds = [
+            os.open(os.path.join(self.lock_dir, str(self.first + i)), os.O_RDWR | os.O_CREAT, 0o600)
+            for i in range(self.count)
+        ]
+
+    def _try_acquire(self) -> Optional[int]:
+        with self._lock:
+            if not self._fds:
+                self._open()
+            for slot in list(self._free):
+                try:
+                    fcntl.flock(self._fds[slot], fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # leased by another process
+                self._free.remove(slot)
+                self.leases += 1
+                return slot
+            self.waits += 1
+            return None
+
+    @contextmanager
+    def lease(self) -> Iterator[int]:
+        """A uid no other run holds until the block exits; waits while all are taken."""
+        slot = self._try_acquire()
+        while slot is None:
+            time.sleep(0.005)
+            slot = self._try_acquire()
+        try:
+            yield self.first + slot
+        finally:
+            with self._lock:
+                fcntl.flock(self._fds[slot], fcntl.LOCK_UN)
+                self._free.append(slot)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "first": self.first,
+                "count": self.count,
+                "in_use": self.count - len(self._free),
+                "leases": self.leases,
+                "waits": self.waits,
+            }
+
+pool = UidPool(settings.JUDGE_RUN_UID, settings.JUDGE_RUN_UIDS, os.path.join(tempfile.gettempdir(), "judge-run-uids"))
@@ -1,6 +1,26 @@
-import subprocess, tempfile, time, os, sys
+import subprocess, tempfile, time, os, sys, threading, json
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ..core.config import Settings
+from . import run_uids, sandbox, sandbox_worker
+
+settings = Settings()
 
 MAX_OUTPUT_CHARS = 10000
+# bytes of stdout/stderr kept per run: enough to fill MAX_OUTPUT_CHARS after decoding
+_KEEP_BYTES = MAX_OUTPUT_CHARS * 4 + 1
+
+# one pool for the whole process, so concurrent submissions share the cap
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, settings.JUDGE_MAX_WORKERS), thread_name_prefix="judge")
+        return _pool
 
 def _truncate(s: str, limit: int = MAX_OUTPUT_CHARS) -> str:
     if s is None:
@@ -9,58 +29,208 @@ def _truncate(s: str, limit: int = MAX_OUTPUT_CHARS) -> str:
         return s
     return s[:limit] + "\n...[truncated]"
 
-def run_python(code: str, input_text: str, timeout_sec: float = 2.0):
+def run_limits() -> dict:
+    mb = 1024 * 1024
+    return {
+        "cpu_sec": settings.JUDGE_CPU_SEC or None,
+        "memory_bytes": settings.JUDGE_MEMORY_MB * mb or None,
+        "file_bytes": settings.JUDGE_FILE_MB * mb if settings.JUDGE_FILE_MB else None,
+        "nproc": settings.JUDGE_MAX_PROCS or None,
+        "output_bytes": settings.JUDGE_OUTPUT_MB * mb or None,
+        "uid": settings.JUDGE_RUN_UID if settings.JUDGE_RUN_UID >= 0 else None,
+    }
+
+def run_python(code: str, input_text: str | os.PathLike, timeout_sec: float = 2.0,
+               expected: str | os.PathLike | None = None, limits: dict | None = None) -> dict:
+    """
+    Runs `code` once under `limits` (see run_limits) and returns a dict with
+    status (OK|WA|RTE|TLE|MLE|OLE), stdout, stderr, runtime_ms (wall), cpu_ms and
+    memory_kb (peak RSS). `input_text` may be a path, in which case the file is fed
+    to stdin directly. When `expected` is given the output is compared as it
+    streams and the status is WA on a mismatch; only the response prefix is kept.
+    A run that drops its uid gets one of its own from run_uids for its duration.
+    """
+    limits = run_limits() if limits is None else limits
+    if sandbox_worker.run_uid(limits) is None:
+        return _run(code, input_text, timeout_sec, expected, limits)
+    with run_uids.pool.lease() as uid:
+        return _run(code, input_text, timeout_sec, expected, {**limits, "uid": uid})
+
+def _run(code: str, input_text: str | os.PathLike, timeout_sec: float, expected, limits: dict) -> dict:
+    if settings.RUNNER_BACKEND == "forkserver" and sandbox.available():
+        r = sandbox.execute(code, input_text, timeout_sec, _KEEP_BYTES, expected, limits)
+    elif os.name == "posix":
+        r = _run_subprocess(code, input_text, timeout_sec, expected, limits)
+    else:
+        r = _run_subprocess_buffered(code, input_text, timeout_sec, expected)
+    r["stdout"] = _truncate(r["stdout"].strip())
+    r["stderr"] = _truncate(r["stderr"].strip())
+    return r
+
+def _stdin_file(input_text: str | os.PathLike, td: str):
+    if isinstance(input_text, os.PathLike):
+        return open(input_text, "rb")
+    f = tempfile.TemporaryFile(dir=td)
+    f.write(input_text.encode("utf-8"))
+    f.seek(0)
+    return f
+
+def _run_subprocess(code: str, input_text: str | os.PathLike, timeout_sec: float, expected, limits: dict) -> dict:
     with tempfile.TemporaryDirectory() as td:
         script = os.path.join(td, "main.py")
         with open(script, "w", encoding="utf-8") as f:
             f.write(code)
-        start = time.perf_counter()
+        sandbox_worker.grant_workdir(td, limits)
+        if isinstance(expected, os.PathLike):
+            exp = sandbox_worker.ExpectedOutput(path=os.fspath(expected))
+        elif expected is not None:
+            exp = sandbox_worker.ExpectedOutput(text=expected)
+        else:
+            exp = None
+        comparator = sandbox_worker.StreamComparator(exp.data) if exp else None
         try:
-            proc = subprocess.run(
-                [sys.executable, "-I", script],
-                input=input_text,
-                capture_output=True,
-                text=True,
-                timeout=timeout_sec
-            )
-            runtime_ms = (time.perf_counter() - start) * 1000.0
-            stdout = _truncate(proc.stdout.strip())
-            stderr = _truncate(proc.stderr.strip())
-            if proc.returncode != 0:
-                return "RTE", stdout, stderr, runtime_ms
-            return "OK", stdout, stderr, runtime_ms
-        except subprocess.TimeoutExpired as e:
-            runtime_ms = (time.perf_counter() - start) * 1000.0
-            stdout = _truncate((e.stdout or "").strip())
-            stderr = _truncate((e.stderr or "").strip())
-            return "TLE", stdout, stderr, runtime_ms
-
-def judge_python(code: str, tests: list[tuple[str, str]], timeout_sec: float = 2.0):
-    all_pass = True
-    results = []
-    total_ms = 0.0
-    for idx, (inp, exp) in enumerate(tests, start=1):
-        status, out, err, t = run_python(code, inp, timeout_sec=timeout_sec)
-        total_ms += t or 0.0
-        passed = False
-        test_status = status
-        if status == "OK":
-            norm_out = out.strip()
-            norm_exp = exp.strip()
-            passed = (norm_out == norm_exp)
-            if not passed:
-                test_status = "WA"
+            with _stdin_file(input_text, td) as stdin:
+                start = time.perf_counter()
+                # the worker module doubles as a launcher that applies the limits first
+                proc = subprocess.Popen(
+                    [sys.executable, "-I", sandbox.WORKER_PATH, "--exec", script, json.dumps(limits)],
+                    stdin=stdin,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    cwd=td,
+                    start_new_session=True,  # its own process group, killed as a whole by reap()
+                )
+            with proc:
+                out, err, outcome = sandbox_worker.pump(
+                    proc.stdout.fileno(), proc.stderr.fileno(), start + timeout_sec, _KEEP_BYTES,
+                    comparator, limits.get("output_bytes"),
+                )
+                outcome, wstatus, rusage = sandbox_worker.reap(proc.pid, start + timeout_sec, outcome)
+                proc.returncode = os.waitstatus_to_exitcode(wstatus)
+                runtime_ms = (time.perf_counter() - start) * 1000.0
+        finally:
+            uid = sandbox_worker.run_uid(limits)
+            if uid is not None:
+                # forking here would copy a multi-threaded process; the launcher does it instead
+                subprocess.run([sys.executable, "-I", sandbox.WORKER_PATH, "--kill-uid", str(uid)], check=False)
+            if exp:
+                exp.close()
+        return {
+            "status": sandbox_worker.verdict(outcome, wstatus, comparator),
+            "stdout": out.decode("utf-8", errors="replace"),
+            "stderr": err.decode("utf-8", errors="replace"),
+            "runtime_ms": runtime_ms,
+            **sandbox_worker.usage(rusage),
+        }
+
+def _run_subprocess_buffered(code: str, input_text: str | os.PathLike, timeout_sec: float, expected) -> dict:
+    # platforms without select() on pipes or rlimits: capture everything, then compare
+    with tempfile.TemporaryDirectory() as td:
+        script = os.path.join(td, "main.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(code)
+        r = {"cpu_ms": None, "memory_kb": None}
+        with _stdin_file(input_text, td) as stdin:
+            start = time.perf_counter()
+            try:
+                proc = subprocess.run(
+                    [sys.executable, "-I", script],
+                    stdin=stdin,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout_sec,
+                )
+            except subprocess.TimeoutExpired as e:
+                r.update(status="TLE", stdout=e.stdout or "", stderr=e.stderr or "",
+                         runtime_ms=(time.perf_counter() - start) * 1000.0)
+                return r
+        r.update(stdout=proc.stdout, stderr=proc.stderr, runtime_ms=(time.perf_counter() - start) * 1000.0)
+        if proc.returncode != 0:
+            r["status"] = "RTE"
+        elif expected is not None:
+            if isinstance(expected, os.PathLike):
+                with open(expected, encoding="utf-8") as f:
+                    expected = f.read()
+            r["status"] = "OK" if proc.stdout.strip() == expected.strip() else "WA"
         else:
-            all_pass = False
-        if not passed:
-            all_pass = False
-        results.append({
-            "idx": idx,
-            "passed": passed,
-            "status": test_status,
-            "stdout": out,
-            "stderr": err,
-            "runtime_ms": t,
-        })
-    overall = "Accepted" if all_pass and len(tests) > 0 else "Wrong Answer"
+            r["status"] = "OK"
+        return r
+
+# resource-limit failures get their own submission verdict; everything else stays Wrong Answer
+_LIMIT_VERDICTS = {"MLE": "Memory Limit Exceeded", "OLE": "Output Limit Exceeded"}
+
+def _run_test(code: str, idx: int, inp: str | os.PathLike, exp: str | os.PathLike, timeout_sec: float) -> dict:
+    r = run_python(code, inp, timeout_sec=timeout_sec, expected=exp)
+    return {
+        "idx": idx,
+        "passed": r["status"] == "OK",
+        "status": r["status"],
+        "stdout": r["stdout"],
+        "stderr": r["stderr"],
+        "runtime_ms": r["runtime_ms"],
+        "cpu_ms": r["cpu_ms"],
+        "memory_kb": r["memory_kb"],
+    }
+
+def _skipped(idx: int) -> dict:
+    return {"idx": idx, "passed": False, "status": "SKIP", "stdout": "", "stderr": "",
+            "runtime_ms": None, "cpu_ms": None, "memory_kb": None}
+
+def _judge_serial(code, tests, timeout_sec, stop_on_failure, on_result) -> dict[int, dict]:
+    done = {}
+    for idx, (inp, exp) in enumerate(tests, start=1):
+        done[idx] = _run_test(code, idx, inp, exp, timeout_sec)
+        if on_result:
+            on_result(done[idx])
+        if stop_on_failure and not done[idx]["passed"]:
+            break
+    return done
+
+def _judge_parallel(code, tests, timeout_sec, stop_on_failure, on_result) -> dict[int, dict]:
+    pool = _executor()
+    futures = {
+        pool.submit(_run_test, code, idx, inp, exp, timeout_sec): idx
+        for idx, (inp, exp) in enumerate(tests, start=1)
+    }
+    done = {}
+    pending = set(futures)
+    while pending:
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        failed = False
+        for f in finished:
+            if f.cancelled():
+                continue
+            r = f.result()
+            done[futures[f]] = r
+            if on_result:
+                on_result(r)
+            failed = failed or not r["passed"]
+        if failed and stop_on_failure:
+            # tests already running finish normally; queued ones never start
+            for f in pending:
+                f.cancel()
+    return done
+
+def judge_python(code: str, tests: list[tuple[str | os.PathLike, str | os.PathLike]], timeout_sec: float = 2.0,
+                 parallel: bool = False, stop_on_failure: bool = False,
+                 on_result: Optional[Callable[[dict], None]] = None):
+    """
+    Runs `code` against every (input, expected) pair. With `parallel` the tests
+    are spread over the shared judge pool; results always come back in idx order.
+    With `stop_on_failure` the remaining tests are skipped after the first failure
+    and reported with status SKIP. `on_result` is called with each test result
+    as soon as it is known, in completion order.
+    """
+    if parallel and len(tests) > 1:
+        done = _judge_parallel(code, tests, timeout_sec, stop_on_failure, on_result)
+    else:
+        done = _judge_serial(code, tests, timeout_sec, stop_on_failure, on_result)
+    results = [done.get(idx) or _skipped(idx) for idx in range(1, len(tests) + 1)]
+    total_ms = sum(r["runtime_ms"] or 0.0 for r in results)
+    all_pass = all(r["passed"] for r in results)
+    if all_pass and len(tests) > 0:
+        overall = "Accepted"
+    else:
+        failed = next((r["status"] for r in results if r["status"] in _LIMIT_VERDICTS), None)
+        overall = _LIMIT_VERDICTS.get(failed, "Wrong Answer")
     return overall, results, total_ms
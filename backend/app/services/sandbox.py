@@ -0,0 +1,161 @@
+# backend/app/services/sandbox.py
+#
+# Host side of the fork-server sandbox: a pool of warm sandbox_worker processes.
+# A worker serves one request at a time; callers borrow one from the pool.
+# Expected outputs stay in this process: the worker relays the run's stdout and
+# the comparison happens here, so user code has nothing to find in its memory.
+import atexit, json, os, queue, selectors, subprocess, sys, threading, time
+
+from . import sandbox_worker
+from ..core.config import Settings
+
+settings = Settings()
+
+WORKER_PATH = os.path.abspath(sandbox_worker.__file__)
+# time the worker itself may need on top of the user's budget (fork, reap, cleanup)
+_GRACE_SEC = 5.0
+
+def available() -> bool:
+    return hasattr(os, "fork")
+
+class SandboxError(RuntimeError):
+    pass
+
+class _Worker:
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", WORKER_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+
+    def _read_exact(self, n: int, deadline: float) -> bytes:
+        fd = self.proc.stdout.fileno()
+        buf = bytearray()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while len(buf) < n:
+                left = deadline - time.monotonic()
+                if left <= 0 or not sel.select(left):
+                    raise SandboxError("sandbox worker did not answer in time")
+                chunk = os.read(fd, n - len(buf))
+                if not chunk:
+                    raise SandboxError("sandbox worker exited")
+                buf += chunk
+        return bytes(buf)
+
+    def _send(self, msg: dict) -> None:
+        try:
+            sandbox_worker.write_frame(self.proc.stdin.fileno(), msg)
+        except OSError as e:
+            raise SandboxError(f"sandbox worker unavailable: {e}") from e
+
+    def call(self, req: dict, timeout_sec: float, comparator: sandbox_worker.StreamComparator | None = None) -> dict:
+        """Runs `req`, feeding the relayed stdout to `comparator` and stopping the run on its first mismatch."""
+        deadline = time.monotonic() + timeout_sec + _GRACE_SEC
+        self._send(req)
+        stopped = False
+        while True:
+            kind, n = sandbox_worker.TAGGED.unpack(self._read_exact(sandbox_worker.TAGGED.size, deadline))
+            body = self._read_exact(n, deadline)
+            if kind == b"r":
+                return json.loads(body)
+            if comparator is not None and not stopped and not comparator.feed(body):
+                self._send({"stop": True})
+                stopped = True
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=1)
+        except Exception:
+            pass
+
+class WorkerPool:
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._idle: "queue.LifoQueue[_Worker]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._spawned = 0
+        self._all: set[_Worker] = set()
+
+    def _acquire(self) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._spawned < self.size:
+                self._spawned += 1
+                try:
+                    w = _Worker()
+                except Exception:
+                    self._spawned -= 1
+                    raise
+                self._all.add(w)
+                return w
+        return self._idle.get()
+
+    def _discard(self, w: _Worker) -> None:
+        w.kill()
+        with self._lock:
+            self._all.discard(w)
+            self._spawned -= 1
+
+    def execute(self, code: str, input_text: str | os.PathLike, timeout_sec: float, keep_bytes: int,
+                expected: str | os.PathLike | None = None, limits: dict | None = None) -> dict:
+        req = {"code": code, "timeout": timeout_sec, "keep_bytes": keep_bytes, "limits": limits or {}}
+        if isinstance(input_text, os.PathLike):
+            req["input_path"] = os.fspath(input_text)
+        else:
+            req["input"] = input_text
+        if isinstance(expected, os.PathLike):
+            exp = sandbox_worker.ExpectedOutput(path=os.fspath(expected))
+        elif expected is not None:
+            exp = sandbox_worker.ExpectedOutput(text=expected)
+        else:
+            exp = None
+        comparator = sandbox_worker.StreamComparator(exp.data) if exp else None
+        req["relay"] = comparator is not None
+        w = self._acquire()
+        try:
+            resp = w.call(req, timeout_sec, comparator)
+        except BaseException:
+            self._discard(w)
+            raise
+        finally:
+            if exp:
+                exp.close()
+        self._idle.put(w)
+        if resp.get("status") == "ERR":
+            raise SandboxError(resp.get("stderr") or "sandbox failure")
+        if comparator is not None and resp["status"] in ("OK", "RTE", "TLE"):
+            # a mismatch wins over whatever the stopped run died of, as it does in pump()
+            if comparator.mismatch or (resp["status"] == "OK" and not comparator.matched()):
+                resp["status"] = "WA"
+        return resp
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._all)
+            self._all.clear()
+            self._spawned = 0
+        for w in workers:
+            w.kill()
+
+_pool: WorkerPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> WorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(settings.SANDBOX_WORKERS)
+            atexit.register(_pool.shutdown)
+        return _pool
+
+def execute(code: str, input_text: str | os.PathLike, timeout_sec: float, keep_bytes: int,
+            expected: str | os.PathLike | None = None, limits: dict | None = None) -> dict:
+    return get_pool().execute(code, input_text, timeout_sec, keep_bytes, expected, limits)
@@ -0,0 +1,411 @@
+# backend/app/services/sandbox_worker.py
+#
+# Fork-server worker. Started once as `python -I sandbox_worker.py` and kept warm;
+# every request is run in a freshly forked child so user code never pays for
+# interpreter start-up. Standard library only: it runs isolated from the app package.
+#
+# Protocol (stdin/stdout of the worker):
+#   host -> worker: 4-byte big-endian length + JSON body.
+#     request:  {"code", "input" | "input_path", "timeout", "keep_bytes", ["relay"], ["limits"]}
+#     stop:     {"stop": true}, ends the current run with WA (and is ignored between runs)
+#   worker -> host: 1-byte kind + 4-byte big-endian length + body.
+#     b"o": a chunk of the child's stdout, sent while a "relay" run is in progress
+#     b"r": the JSON response {"status": OK|WA|RTE|TLE|MLE|OLE, "stdout", "stderr", "runtime_ms", "cpu_ms", "memory_kb"}
+# The expected output never reaches the worker: the children are forked from it, so
+# anything in its memory is readable by user code. With "relay" the host compares the
+# stdout chunks as they arrive and sends a stop on the first mismatch; only keep_bytes
+# of the output are retained in the response.
+# `limits` = {"cpu_sec", "memory_bytes", "file_bytes", "nproc", "output_bytes", "uid"}, each optional.
+# With "uid" and a worker running as root, the child drops to that uid (and gid) after
+# setting its rlimits; RLIMIT_NPROC is not enforced for root, so "nproc" needs it. The
+# host gives each concurrent run its own uid, and every process left with that uid is
+# killed once the run is over.
+#
+# `python -I sandbox_worker.py --exec main.py '<limits json>'` runs one script under the
+# same limits; the subprocess backend uses it as a launcher, and
+# `python -I sandbox_worker.py --kill-uid <uid>` to clean up after a run.
+import builtins, json, mmap, os, selectors, shutil, signal, struct, sys, tempfile, time, traceback
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+# warm the modules most solutions import, children inherit them for free
+import bisect, collections, functools, heapq, itertools, math, re, string  # noqa: F401
+
+HEADER = struct.Struct(">I")
+TAGGED = struct.Struct(">cI")
+_CHUNK = 65536
+# exit code the child uses for MemoryError; a user exit with the same code is reported as 1
+MLE_EXIT = 0x7B
+
+def _read_exact(fd: int, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = os.read(fd, n - len(buf))
+        if not chunk:
+            raise EOFError
+        buf += chunk
+    return bytes(buf)
+
+def read_frame(fd: int) -> dict:
+    (n,) = HEADER.unpack(_read_exact(fd, HEADER.size))
+    return json.loads(_read_exact(fd, n))
+
+def _write_all(fd: int, data: bytes) -> None:
+    data = memoryview(data)
+    while data:
+        data = data[os.write(fd, data):]
+
+def write_frame(fd: int, msg: dict) -> None:
+    body = json.dumps(msg).encode("utf-8")
+    _write_all(fd, HEADER.pack(len(body)) + body)
+
+def write_tagged(fd: int, kind: bytes, body: bytes) -> None:
+    _write_all(fd, TAGGED.pack(kind, len(body)) + body)
+
+def apply_limits(limits: dict) -> None:
+    if resource is None:
+        return
+    if limits.get("cpu_sec"):
+        soft = max(1, int(limits["cpu_sec"] + 0.999))
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
+    if limits.get("memory_bytes"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["memory_bytes"], limits["memory_bytes"]))
+    if limits.get("file_bytes") is not None:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits["file_bytes"], limits["file_bytes"]))
+    if limits.get("nproc") and hasattr(resource, "RLIMIT_NPROC"):
+        resource.setrlimit(resource.RLIMIT_NPROC, (limits["nproc"], limits["nproc"]))
+    # Python ignores SIGXFSZ by default; let it kill the child so we can report OLE
+    if hasattr(signal, "SIGXFSZ"):
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+    uid = run_uid(limits)
+    if uid is not None:
+        os.setgroups([])
+        os.setgid(uid)
+        os.setuid(uid)
+
+def run_uid(limits: dict) -> int | None:
+    """The uid a run drops to, or None when it keeps ours (not root, or no "uid" limit)."""
+    uid = limits.get("uid")
+    if uid is None or not hasattr(os, "geteuid") or os.geteuid() != 0:
+        return None
+    return uid
+
+def grant_workdir(path: str, limits: dict) -> None:
+    """Lets a run that drops its uid write to its working directory."""
+    uid = run_uid(limits)
+    if uid is not None:
+        os.chown(path, uid, uid)
+
+def _child(code: str, workdir: str | None, limits: dict) -> None:
+    # never returns: always leaves through os._exit
+    rc = 0
+    try:
+        if os.getsid(0) != os.getpid():
+            os.setsid()  # own process group: kill_group reaches everything the program forks
+        os.closerange(3, os.sysconf("SC_OPEN_MAX") if hasattr(os, "sysconf") else 1024)
+        if workdir:
+            os.chdir(workdir)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        apply_limits(limits)
+        sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+        sys.argv = ["main.py"]
+        glb = {"__name__": "__main__", "__file__": "main.py", "__builtins__": builtins}
+        exec(compile(code, "main.py", "exec"), glb)
+    except SystemExit as e:
+        if e.code is None:
+            rc = 0
+        elif isinstance(e.code, int):
+            rc = e.code if e.code & 0xFF != MLE_EXIT else 1
+        else:
+            print(e.code, file=sys.stderr)
+            rc = 1
+    except MemoryError:
+        sys.stderr.write("MemoryError\n")
+        rc = MLE_EXIT
+    except BaseException:
+        etype, err, tb = sys.exc_info()
+        traceback.print_exception(etype, err, tb.tb_next)  # hide this frame, start at main.py
+        rc = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except BaseException:
+            rc = rc or 1
+        os._exit(rc & 0xFF)
+
+WHITESPACE = b" \t\n\r\x0b\x0c"
+
+class StreamComparator:
+    """
+    Compares a byte stream against `expected` with the same meaning as
+    `out.strip() == expected.strip()`, without holding the stream in memory.
+    `expected` may be any bytes-like object, e.g. an mmap of the expected file.
+    """
+    def __init__(self, expected):
+        lo, hi = 0, len(expected)
+        while lo < hi and expected[lo] in WHITESPACE:
+            lo += 1
+        while hi > lo and expected[hi - 1] in WHITESPACE:
+            hi -= 1
+        self.expected = expected
+        self.pos = lo
+        self.end = hi
+        self.pending = bytearray()  # whitespace that is only significant if more output follows
+        self.started = False
+        self.mismatch = False
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.mismatch:
+            return False
+        if not self.started:
+            chunk = chunk.lstrip(WHITESPACE)
+            if not chunk:
+                return True
+            self.started = True
+        body = chunk.rstrip(WHITESPACE)
+        tail = chunk[len(body):]
+        if body:
+            data = bytes(self.pending) + body
+            stop = self.pos + len(data)
+            if stop > self.end or self.expected[self.pos:stop] != data:
+                self.mismatch = True
+                return False
+            self.pos = stop
+            self.pending = bytearray()
+        # anything longer than what is left to match can never be followed by a match
+        room = self.end - self.pos + 1 - len(self.pending)
+        if room > 0:
+            self.pending += tail[:room]
+        return True
+
+    def matched(self) -> bool:
+        return not self.mismatch and self.pos == self.end
+
+def pump(out_fd: int, err_fd: int, deadline: float, keep_bytes: int, comparator: StreamComparator | None = None,
+         output_bytes: int | None = None, on_stdout=None, stop_fd: int | None = None):
+    """
+    Drains both pipes until EOF, deadline, the first mismatch or more than
+    output_bytes in total, keeping at most keep_bytes of each. Every stdout chunk
+    is also passed to `on_stdout`, and a stop frame on `stop_fd` counts as a
+    mismatch. Returns (stdout, stderr, outcome) with outcome one of "eof",
+    "timeout", "mismatch" or "output_limit".
+    """
+    kept = {out_fd: bytearray(), err_fd: bytearray()}
+    total = 0
+    sel = selectors.DefaultSelector()
+    sel.register(out_fd, selectors.EVENT_READ)
+    sel.register(err_fd, selectors.EVENT_READ)
+    if stop_fd is not None:
+        sel.register(stop_fd, selectors.EVENT_READ)
+    outcome = "eof"
+    open_fds = 2
+    try:
+        while open_fds:
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                outcome = "timeout"
+                break
+            for key, _ in sel.select(left):
+                if key.fd == stop_fd:
+                    try:
+                        read_frame(stop_fd)
+                    except EOFError:
+                        pass  # the host is gone, nobody wants the rest of the output
+                    outcome = "mismatch"
+                    return bytes(kept[out_fd]), bytes(kept[err_fd]), outcome
+                chunk = os.read(key.fd, _CHUNK)
+                if not chunk:
+                    sel.unregister(key.fd)
+                    open_fds -= 1
+                    continue
+                buf = kept[key.fd]
+                if len(buf) < keep_bytes:
+                    buf += chunk[:keep_bytes - len(buf)]
+                total += len(chunk)
+                if output_bytes and total > output_bytes:
+                    outcome = "output_limit"
+                    return bytes(kept[out_fd]), bytes(kept[err_fd]), outcome
+                if key.fd != out_fd:
+                    continue
+                if on_stdout is not None:
+                    on_stdout(chunk)
+                if comparator is not None and not comparator.feed(chunk):
+                    outcome = "mismatch"
+                    return bytes(kept[out_fd]), bytes(kept[err_fd]), outcome
+    finally:
+        sel.close()
+    return bytes(kept[out_fd]), bytes(kept[err_fd]), outcome
+
+def verdict(outcome: str, wstatus: int, comparator: StreamComparator | None) -> str:
+    if outcome == "timeout":
+        return "TLE"
+    if outcome == "output_limit":
+        return "OLE"
+    if outcome == "mismatch":
+        return "WA"
+    if os.WIFSIGNALED(wstatus):
+        sig = os.WTERMSIG(wstatus)
+        if sig == getattr(signal, "SIGXCPU", None) or sig == signal.SIGKILL:
+            return "TLE"  # CPU limit: SIGXCPU at the soft limit, SIGKILL at the hard one
+        if sig == getattr(signal, "SIGXFSZ", None):
+            return "OLE"
+        return "RTE"
+    code = os.WEXITSTATUS(wstatus)
+    if code == MLE_EXIT:
+        return "MLE"
+    if code != 0:
+        return "RTE"
+    if comparator is not None and not comparator.matched():
+        return "WA"
+    return "OK"
+
+def kill_group(pid: int) -> None:
+    """SIGKILLs the run's process group and, in case it has not called setsid yet, the run itself."""
+    for kill, target in ((os.killpg, pid), (os.kill, pid)):
+        try:
+            kill(target, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+def _kill_all_as(uid: int) -> None:
+    # never returns; kill(-1) reaches every process of our uid except ourselves
+    try:
+        os.setgroups([])
+        os.setgid(uid)
+        os.setuid(uid)
+        os.kill(-1, signal.SIGKILL)
+    except OSError:
+        pass  # ProcessLookupError: nothing left
+    os._exit(0)
+
+def kill_uid(uid: int) -> None:
+    """SIGKILLs every process of `uid`, including anything a run moved out of its process group."""
+    pid = os.fork()
+    if pid == 0:
+        _kill_all_as(uid)
+    os.waitpid(pid, 0)
+
+def reap(pid: int, deadline: float, outcome: str):
+    """
+    Waits for the run `pid` after pump() returned `outcome`, returning
+    (outcome, wstatus, rusage). EOF on both pipes does not mean the program
+    exited (it may have closed them), so it is only waited for until `deadline`,
+    after which the outcome becomes "timeout". The process group is killed on
+    every path, so nothing the program forked outlives the run.
+    """
+    if outcome == "eof":
+        delay = 0.001
+        # WNOWAIT leaves the child a zombie, so its pid (and group id) cannot be reused before kill_group
+        while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                outcome = "timeout"
+                break
+            time.sleep(min(delay, left))
+            delay = min(delay * 2, 0.02)
+    kill_group(pid)
+    _, wstatus, rusage = os.wait4(pid, 0)
+    return outcome, wstatus, rusage
+
+class ExpectedOutput:
+    """Expected output as bytes, or an mmap of the file when given a path."""
+    def __init__(self, text: str | None = None, path: str | None = None):
+        self._file = None
+        self._map = None
+        if path:
+            self._file = open(path, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = self._map if self._map is not None else b""
+        else:
+            self.data = (text or "").encode("utf-8")
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+def usage(rusage) -> dict:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    maxrss = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    return {"cpu_ms": (rusage.ru_utime + rusage.ru_stime) * 1000.0, "memory_kb": int(maxrss)}
+
+def run(code: str, input_text: str, timeout: float, keep_bytes: int, input_path: str | None = None,
+        relay: bool = False, limits: dict | None = None) -> dict:
+    limits = limits or {}
+    workdir = tempfile.mkdtemp(prefix="sbx-")
+    grant_workdir(workdir, limits)
+    if input_path:
+        stdin = open(input_path, "rb")
+    else:
+        stdin = tempfile.TemporaryFile(dir=workdir)
+        stdin.write(input_text.encode("utf-8"))
+        stdin.seek(0)
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.dup2(stdin.fileno(), 0)
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)
+        _child(code, workdir, limits)
+    os.close(out_w)
+    os.close(err_w)
+    stdin.close()
+    try:
+        out, err, outcome = pump(
+            out_r, err_r, start + timeout, keep_bytes, None, limits.get("output_bytes"),
+            on_stdout=(lambda chunk: write_tagged(1, b"o", chunk)) if relay else None,
+            stop_fd=0 if relay else None,
+        )
+        outcome, wstatus, rusage = reap(pid, start + timeout, outcome)
+        runtime_ms = (time.perf_counter() - start) * 1000.0
+        status = verdict(outcome, wstatus, None)
+    finally:
+        os.close(out_r)
+        os.close(err_r)
+        if run_uid(limits) is not None:
+            kill_uid(run_uid(limits))
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "status": status,
+        "stdout": out.decode("utf-8", errors="replace"),
+        "stderr": err.decode("utf-8", errors="replace"),
+        "runtime_ms": runtime_ms,
+        **usage(rusage),
+    }
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--exec":
+        with open(sys.argv[2], encoding="utf-8") as f:
+            code = f.read()
+        _child(code, None, json.loads(sys.argv[3]) if len(sys.argv) > 3 else {})
+    if len(sys.argv) > 1 and sys.argv[1] == "--kill-uid":
+        _kill_all_as(int(sys.argv[2]))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the host owns our lifetime
+    while True:
+        try:
+            req = read_frame(0)
+        except EOFError:
+            return
+        if req.get("stop"):
+            continue  # sent just as the previous run finished on its own
+        try:
+            resp = run(
+                req["code"], req.get("input", ""), float(req["timeout"]), int(req["keep_bytes"]),
+                req.get("input_path"), bool(req.get("relay")), req.get("limits"),
+            )
+        except Exception as e:  # worker-side failure, not the user's program
+            resp = {"status": "ERR", "stdout": "", "stderr": repr(e), "runtime_ms": None, "cpu_ms": None, "memory_kb": None}
+        write_tagged(1, b"r", json.dumps(resp).encode("utf-8"))
+
+if __name__ == "__main__":
+    main()
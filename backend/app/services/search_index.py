@@ -0,0 +1,191 @@
+# backend/app/services/search_index.py
+#
+# In-process inverted index over problem titles and bodies. Works the same on
+# SQLite and Postgres, ranks with BM25 (title terms weigh more), and expands each
+# query term to prefixes and single-typo variants of indexed terms. Documents keep
+# the columns searches can be sorted by, so a page of hits is picked here and only
+# that page's rows are read from the database.
+import bisect, heapq, math, re, threading, time
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings
+from ..models.problem import Problem
+
+settings = Settings()
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+TITLE_WEIGHT = 3.0
+PREFIX_WEIGHT = 0.7
+TYPO_WEIGHT = 0.5
+MAX_EXPANSIONS = 50
+_K1, _B = 1.2, 0.75
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall((text or "").lower())
+
+def _deletions(term: str) -> set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (len(diff) == 2 and diff[1] == diff[0] + 1
+                                  and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+    if len(a) > len(b):
+        a, b = b, a
+    return any(b[:i] + b[i + 1:] == a for i in range(len(b)))
+
+class Doc(NamedTuple):
+    domain: str
+    difficulty: str
+    length: float
+    created_at: Any
+    title: str
+
+class SearchIndex:
+    def __init__(self, reconcile_sec: float = 60.0):
+        self._postings: dict[str, dict[int, float]] = {}  # term -> {problem id: weighted tf}
+        self._docs: dict[int, Doc] = {}
+        self._terms: list[str] = []  # sorted vocabulary for prefix lookups
+        self._typos: dict[str, set[str]] = {}  # deletion variant -> terms
+        self._total_length = 0.0
+        self._max_id = 0
+        self.reconcile_sec = reconcile_sec
+        self._reconciled_at = time.monotonic()  # the first refresh loads everything anyway
+        self.reconciled = 0  # problems found below the watermark
+        self._lock = threading.RLock()
+
+    def add(self, p: Problem) -> None:
+        tf: dict[str, float] = {}
+        for t in tokenize(p.title):
+            tf[t] = tf.get(t, 0.0) + TITLE_WEIGHT
+        for t in tokenize(p.body):
+            tf[t] = tf.get(t, 0.0) + 1.0
+        length = sum(tf.values())
+        with self._lock:
+            if p.id in self._docs:
+                return
+            self._docs[p.id] = Doc(p.domain, p.difficulty, length, p.created_at, p.title)
+            self._total_length += length
+            self._max_id = max(self._max_id, p.id)
+            for term, weight in tf.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = {}
+                    bisect.insort(self._terms, term)
+                    if len(term) >= 4:
+                        for d in _deletions(term):
+                            self._typos.setdefault(d, set()).add(term)
+                posting[p.id] = weight
+
+    def refresh(self, db: Session) -> None:
+        """Indexes problems created since the last refresh, including by other processes.
+
+        New problems are found past the highest indexed id. Concurrent transactions
+        can commit ids out of order, so every reconcile_sec the full id list is
+        compared with the index as well, picking up any that committed below it.
+        """
+        latest = db.query(func.max(Problem.id)).scalar() or 0
+        if latest > self._max_id:
+            for p in db.query(Problem).filter(Problem.id > self._max_id).order_by(Problem.id.asc()).yield_per(500):
+                self.add(p)
+        if time.monotonic() - self._reconciled_at >= self.reconcile_sec:
+            self._reconciled_at = time.monotonic()
+            self._reconcile(db)
+
+    def _reconcile(self, db: Session) -> None:
+        ids = [pid for (pid,) in db.query(Problem.id)]
+        with self._lock:
+            missing = [pid for pid in ids if pid not in self._docs]
+        for i in range(0, len(missing), 500):
+            for p in db.query(Problem).filter(Problem.id.in_(missing[i:i + 500])):
+                self.add(p)
+        with self._lock:
+            self.reconciled += len(missing)
+
+    def _expand(self, term: str) -> dict[str, float]:
+        out = {}
+        if term in self._postings:
+            out[term] = 1.0
+        i = bisect.bisect_left(self._terms, term)
+        while i < len(self._terms) and len(out) < MAX_EXPANSIONS and self._terms[i].startswith(term):
+            out.setdefault(self._terms[i], PREFIX_WEIGHT)
+            i += 1
+        if len(term) >= 4:
+            candidates = set(self._typos.get(term, ()))
+            for d in _deletions(term):
+                candidates |= self._typos.get(d, set())
+                if d in self._postings:
+                    candidates.add(d)
+            for c in candidates:
+                if c not in out and _within_one_edit(term, c):
+                    out[c] = TYPO_WEIGHT
+        return out
+
+    def _scores(self, q: str, domain: str | None, difficulty: str | None) -> dict[int, float]:
+        """Scores of the problems matching every query term; call with the lock held."""
+        terms = list(dict.fromkeys(tokenize(q)))
+        if not terms:
+            return {}
+        n = len(self._docs)
+        if not n:
+            return {}
+        avg = self._total_length / n
+        scores: dict[int, float] | None = None
+        for term in terms:
+            term_scores: dict[int, float] = {}
+            for variant, weight in self._expand(term).items():
+                posting = self._postings[variant]
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for pid, tf in posting.items():
+                    length = self._docs[pid].length
+                    s = weight * idf * tf * (_K1 + 1) / (tf + _K1 * (1 - _B + _B * length / avg))
+                    if s > term_scores.get(pid, 0.0):
+                        term_scores[pid] = s
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pid: s + term_scores[pid] for pid, s in scores.items() if pid in term_scores}
+            if not scores:
+                return {}
+        return {
+            pid: s for pid, s in scores.items()
+            if (not domain or self._docs[pid].domain == domain)
+            and (not difficulty or self._docs[pid].difficulty == difficulty)
+        }
+
+    def search(self, q: str, domain: str | None = None, difficulty: str | None = None,
+               top: Optional[int] = None) -> tuple[int, list[tuple[int, float]]]:
+        """Returns the number of problems matching every query term and (problem id,
+        score) for the best `top` of them (all without it), best first."""
+        with self._lock:
+            scores = self._scores(q, domain, difficulty)
+        key = lambda h: (-h[1], -h[0])
+        if top is None:
+            return len(scores), sorted(scores.items(), key=key)
+        return len(scores), heapq.nsmallest(top, scores.items(), key=key)
+
+    def search_sorted(self, q: str, domain: str | None, difficulty: str | None, field: str, asc: bool,
+                      after: Optional[list], top: int) -> tuple[int, list[int]]:
+        """Like search, but ordered by (`field`, id) instead of score: returns the number
+        of matches and the ids of the first `top` past `after` = [field value, id]."""
+        with self._lock:
+            scores = self._scores(q, domain, difficulty)
+            keys = [(getattr(self._docs[pid], field), pid) for pid in scores]
+        if after is not None:
+            after = tuple(after)
+            keys = [k for k in keys if (k > after if asc else k < after)]
+        page = heapq.nsmallest(top, keys) if asc else heapq.nlargest(top, keys)
+        return len(scores), [pid for _, pid in page]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"documents": len(self._docs), "terms": len(self._terms), "max_id": self._max_id,
+                    "reconciled": self.reconciled}
+
+index = SearchIndex(settings.SEARCH_INDEX_RECONCILE_SEC)
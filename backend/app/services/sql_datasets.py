@@ -0,0 +1,253 @@
+# backend/app/services/sql_datasets.py
+#
+# Practice datasets for the SQL playground, stored as read-only SQLite snapshot
+# files named after their version. A snapshot is built once, by a seed script
+# or by a generator that fills large tables with recursive CTEs, then opened
+# read-only with mmap by every connection, so cold start is one open() and the
+# pages are shared through the OS page cache by every thread and worker.
+#
+# Generated data is a pure function of the row number (no random()), so any
+# process that builds a snapshot produces the same file, and results cached
+# against a dataset version stay valid everywhere. Builds take a lock file per
+# dataset next to the snapshots, so however many workers start at once each
+# snapshot is built by one process and the others wait for it and open it.
+#
+# Prebuild snapshots at deploy time instead of on first query:
+#
+#     python -m app.services.sql_datasets            # every dataset
+#     SQL_DATASET_ROWS=10000000 python -m app.services.sql_datasets shop logs
+import os, sqlite3, sys, tempfile, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional
+try:
+    import fcntl
+except ImportError:  # Windows: one process per host, the thread locks are enough
+    fcntl = None
+
+from ..core.config import Settings
+
+settings = Settings()
+
+class Spec(NamedTuple):
+    name: str
+    description: str
+    revision: int  # bump when the schema or the generator changes
+    build: Callable[[sqlite3.Connection, int], None]
+    scaled: bool = False  # sized by SQL_DATASET_ROWS
+
+def _script(sql: str) -> Callable[[sqlite3.Connection, int], None]:
+    return lambda conn, rows: conn.executescript(sql)
+
+def _h(i: str, salt: int, mod: int) -> str:
+    """SQL for a deterministic pseudo-random value in [0, mod) derived from row number `i`."""
+    return f"((({i}) * 2654435761 + {salt * 40503 + 12345}) % 4294967291 % {mod})"
+
+def _fill(conn: sqlite3.Connection, table: str, columns: str, n: int, select: str) -> None:
+    conn.execute(
+        f"WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < {int(n)}) "
+        f"INSERT INTO {table} ({columns}) SELECT {select} FROM seq"
+    )
+
+def _pick(i: str, salt: int, words: tuple[str, ...]) -> str:
+    cases = " ".join(f"WHEN {k} THEN '{w}'" for k, w in enumerate(words))
+    return f"CASE {_h(i, salt, len(words))} {cases} END"
+
+_REGIONS = ("North", "South", "East", "West", "Central")
+_CATEGORIES = ("Accessories", "Audio", "Books", "Clothing", "Garden", "Grocery", "Kitchen", "Sports", "Toys")
+_STATUSES = ("delivered", "delivered", "delivered", "shipped", "cancelled", "returned")
+_PATHS = ("/", "/login", "/search", "/cart", "/checkout", "/api/items", "/api/orders", "/static/app.js")
+_METHODS = ("GET", "GET", "GET", "POST")
+_HTTP = ("200", "200", "200", "200", "200", "200", "301", "404", "500")
+
+def _build_shop(conn: sqlite3.Connection, rows: int) -> None:
+    customers, products = max(100, rows // 20), max(50, rows // 1000)
+    conn.executescript("""
+        CREATE TABLE customers(id INTEGER PRIMARY KEY, name TEXT, region TEXT, signup_date TEXT);
+        CREATE TABLE products(id INTEGER PRIMARY KEY, name TEXT, category TEXT, price REAL);
+        CREATE TABLE orders(
+          id INTEGER PRIMARY KEY,
+          customer_id INTEGER REFERENCES customers(id),
+          product_id INTEGER REFERENCES products(id),
+          quantity INTEGER,
+          unit_price REAL,
+          status TEXT,
+          order_date TEXT
+        );
+    """)
+    _fill(conn, "customers", "id, name, region, signup_date", customers,
+          f"i, 'customer_' || i, {_pick('i', 1, _REGIONS)}, date('2022-01-01', '+' || {_h('i', 2, 730)} || ' days')")
+    _fill(conn, "products", "id, name, category, price", products,
+          f"i, 'product_' || i, {_pick('i', 3, _CATEGORIES)}, ({_h('i', 4, 49900)} + 100) / 100.0")
+    _fill(conn, "orders", "id, customer_id, product_id, quantity, unit_price, status, order_date", rows,
+          f"i, {_h('i', 5, customers)} + 1, {_h('i', 6, products)} + 1, {_h('i', 7, 5)} + 1, "
+          f"({_h('i', 8, 49900)} + 100) / 100.0, {_pick('i', 9, _STATUSES)}, "
+          f"date('2024-01-01', '+' || (i * 730 / {rows}) || ' days')")
+    conn.executescript("""
+        CREATE INDEX ix_orders_customer ON orders(customer_id);
+        CREATE INDEX ix_orders_date ON orders(order_date);
+    """)
+
+def _build_logs(conn: sqlite3.Connection, rows: int) -> None:
+    conn.execute("""
+        CREATE TABLE requests(
+          id INTEGER PRIMARY KEY,
+          ts TEXT,
+          user_id INTEGER,
+          method TEXT,
+          path TEXT,
+          status INTEGER,
+          latency_ms INTEGER,
+          bytes INTEGER
+        )
+    """)
+    # one request every ~3s from 2025-01-01, so ts follows id
+    _fill(conn, "requests", "id, ts, user_id, method, path, status, latency_ms, bytes", rows,
+          f"i, datetime(1735689600 + i * 3 + {_h('i', 1, 3)}, 'unixepoch'), "
+          f"CASE WHEN {_h('i', 2, 10)} = 0 THEN NULL ELSE {_h('i', 3, max(10, rows // 100))} + 1 END, "
+          f"{_pick('i', 4, _METHODS)}, {_pick('i', 5, _PATHS)}, CAST({_pick('i', 6, _HTTP)} AS INTEGER), "
+          f"5 + {_h('i', 7, 50)} * {_h('i', 8, 20)}, {_h('i', 9, 200000)}")
+    conn.execute("CREATE INDEX ix_requests_ts ON requests(ts)")
+
+def _build_metrics(conn: sqlite3.Connection, rows: int) -> None:
+    sensors = 100
+    conn.executescript("""
+        CREATE TABLE sensors(id INTEGER PRIMARY KEY, site TEXT, kind TEXT);
+        CREATE TABLE readings(sensor_id INTEGER REFERENCES sensors(id), ts TEXT, value REAL,
+                              PRIMARY KEY(sensor_id, ts)) WITHOUT ROWID;
+    """)
+    _fill(conn, "sensors", "id, site, kind", sensors,
+          f"i, 'site_' || ({_h('i', 1, 10)} + 1), {_pick('i', 2, ('temperature', 'humidity', 'power'))}")
+    # every sensor reports once a minute; values drift with a daily cycle plus noise
+    _fill(conn, "readings", "sensor_id, ts, value", rows,
+          f"(i - 1) % {sensors} + 1, datetime(1735689600 + (i - 1) / {sensors} * 60, 'unixepoch'), "
+          f"round(20 + ((i - 1) / {sensors} % 1440 - 720) / 72.0 + {_h('i', 3, 400)} / 100.0, 2)")
+
+SPECS: dict[str, Spec] = {s.name: s for s in (
+    Spec("ecommerce", "Three customers, three products, four orders.", 1, _script("""
+        CREATE TABLE customers(
+          id INTEGER PRIMARY KEY,
+          name TEXT,
+          region TEXT
+        );
+        CREATE TABLE products(
+          id INTEGER PRIMARY KEY,
+          name TEXT,
+          category TEXT,
+          price REAL
+        );
+        CREATE TABLE orders(
+          id INTEGER PRIMARY KEY,
+          customer_id INTEGER,
+          product_id INTEGER,
+          quantity INTEGER,
+          order_date TEXT,
+          FOREIGN KEY(customer_id) REFERENCES customers(id),
+          FOREIGN KEY(product_id) REFERENCES products(id)
+        );
+        INSERT INTO customers(id,name,region) VALUES
+          (1,'Asha','North'),(2,'Rohan','South'),(3,'Meera','West');
+        INSERT INTO products(id,name,category,price) VALUES
+          (1,'Keyboard','Accessories',1499.0),
+          (2,'Mouse','Accessories',799.0),
+          (3,'Headphones','Audio',2999.0);
+        INSERT INTO orders(id,customer_id,product_id,quantity,order_date) VALUES
+          (1,1,1,1,'2025-01-05'),
+          (2,1,2,2,'2025-02-10'),
+          (3,2,3,1,'2025-03-15'),
+          (4,3,1,3,'2025-04-20');
+    """)),
+    Spec("tiny", "A single column of five numbers.", 1, _script("""
+        CREATE TABLE nums(n INTEGER);
+        INSERT INTO nums(n) VALUES (1),(2),(3),(4),(5);
+    """)),
+    Spec("shop", "Customers, products and a large orders table.", 1, _build_shop, scaled=True),
+    Spec("logs", "Web server request log.", 1, _build_logs, scaled=True),
+    Spec("metrics", "Per-minute sensor readings.", 1, _build_metrics, scaled=True),
+)}
+
+def version(name: str) -> str:
+    """Identifies the snapshot's content; caches of query results key on it."""
+    spec = SPECS[name]
+    return f"r{spec.revision}-{settings.SQL_DATASET_ROWS}" if spec.scaled else f"r{spec.revision}"
+
+def snapshot_path(name: str) -> Path:
+    return Path(settings.SQL_DATASET_DIR).resolve() / f"{name}-{version(name)}.db"
+
+_build_locks = {name: threading.Lock() for name in SPECS}
+
+@contextmanager
+def _file_lock(name: str, wait: bool = True) -> Iterator[bool]:
+    """Holds the lock file `name` in SQL_DATASET_DIR across processes. Yields False
+    instead of waiting when `wait` is off and another process holds it."""
+    directory = Path(settings.SQL_DATASET_DIR).resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield True
+        return
+    fd = os.open(directory / f".{name}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+    finally:
+        os.close(fd)
+
+def ensure_snapshot(name: str) -> Path:
+    """Path of the dataset's snapshot, building it first if it does not exist yet.
+
+    Builds hold only that dataset's locks, in this process and in SQL_DATASET_DIR,
+    so a snapshot another process is building is waited for rather than rebuilt.
+    """
+    path = snapshot_path(name)
+    if path.exists():
+        return path
+    with _build_locks[name], _file_lock(name):
+        if not path.exists():
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{name}-", suffix=".db")
+            os.close(fd)
+            try:
+                conn = sqlite3.connect(tmp, isolation_level=None)
+                try:
+                    conn.execute("PRAGMA journal_mode = OFF")
+                    conn.execute("PRAGMA synchronous = OFF")
+                    SPECS[name].build(conn, settings.SQL_DATASET_ROWS)
+                    conn.execute("ANALYZE")
+                finally:
+                    conn.close()
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+    return path
+
+def prebuild() -> threading.Thread:
+    """Builds missing snapshots in the background, so the first query does not wait.
+
+    Only one process prebuilds: the others starting alongside it return at once and
+    open the snapshots it leaves, waiting on a dataset's lock if it is still building.
+    """
+    def run():
+        with _file_lock("prebuild", wait=False) as mine:
+            if not mine:
+                return
+            for name in SPECS:
+                try:
+                    ensure_snapshot(name)
+                except Exception:
+                    pass  # retried by the first query that needs it
+    thread = threading.Thread(target=run, name="sql-dataset-prebuild", daemon=True)
+    thread.start()
+    return thread
+
+def main(names: Optional[list[str]] = None) -> None:
+    for name in names or SPECS:
+        t0 = time.perf_counter()
+        path = ensure_snapshot(name)
+        print(f"{name:>10}: {path} ({path.stat().st_size / 2**20:.1f} MiB, {time.perf_counter() - t0:.1f}s)")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,92 +1,154 @@
 # backend/app/services/sql_engine.py
-import sqlite3, threading, re
-from typing import Dict, Any, List
+#
+# Read-only SQL playground over the practice datasets in sql_datasets. Every
+# worker thread opens its own read-only, immutable, mmap'd connection to a
+# dataset's snapshot, so concurrent queries never share a connection.
+# Permissions are enforced by SQLite's authorizer and every query runs under a
+# VM-step budget and a wall-clock deadline.
+import base64, hashlib, json, sqlite3, threading, time, re
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Iterator, List, NamedTuple, Optional
 
-_lock = threading.Lock()
-_db_by_dataset: Dict[str, sqlite3.Connection] = {}
+from ..core.config import Settings
+from . import sql_datasets
 
-FORBIDDEN = re.compile(r"\b(INSERT|UPDATE|DELETE|DROP|ALTER|CREATE|ATTACH|DETACH|PRAGMA|REINDEX|VACUUM)\b", re.I)
+settings = Settings()
+
+class QueryError(ValueError):
+    """The query is not allowed or failed to run."""
+
+class QueryTimeout(QueryError):
+    """The query used up its time or step budget."""
+
+class UnknownDataset(KeyError):
+    pass
+
+_PROGRESS_EVERY = 1000  # VM instructions between budget checks
+_MAX_VALUE_BYTES = 1_000_000  # caps strings/blobs a query can build, e.g. zeroblob()
+_FETCH_CHUNK = 1000
+
+_local = threading.local()
+
+try:  # optional, as in core.responses
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+_ALLOWED = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+def _authorize(action, arg1, arg2, db_name, trigger):
+    return sqlite3.SQLITE_OK if action in _ALLOWED else sqlite3.SQLITE_DENY
+
+def _open(dataset: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    if dataset not in sql_datasets.SPECS:
+        raise UnknownDataset(dataset)
+    path = sql_datasets.ensure_snapshot(dataset)
+    # immutable: a snapshot never changes, so SQLite skips locking entirely
+    conn = sqlite3.connect(f"{path.as_uri()}?mode=ro&immutable=1", uri=True, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA query_only = ON")
+    # reads come straight from the OS page cache, shared with every other connection
+    conn.execute(f"PRAGMA mmap_size = {int(settings.SQL_MMAP_BYTES)}")
+    return conn
+
+def _sandboxed(conn: sqlite3.Connection) -> sqlite3.Connection:
+    conn.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, _MAX_VALUE_BYTES)
+    conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+    conn.set_authorizer(_authorize)
+    return conn
 
 def _connect(dataset: str) -> sqlite3.Connection:
-    # Keep one in-memory DB per dataset
-    with _lock:
-        if dataset in _db_by_dataset:
-            return _db_by_dataset[dataset]
-        conn = sqlite3.connect(":memory:", check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        _seed_dataset(conn, dataset)
-        _db_by_dataset[dataset] = conn
-        return conn
-
-def _seed_dataset(conn: sqlite3.Connection, dataset: str):
-    cur = conn.cursor()
-    if dataset == "ecommerce":
-        cur.executescript("""
-        CREATE TABLE customers(
-          id INTEGER PRIMARY KEY,
-          name TEXT,
-          region TEXT
-        );
-        CREATE TABLE products(
-          id INTEGER PRIMARY KEY,
-          name TEXT,
-          category TEXT,
-          price REAL
-        );
-        CREATE TABLE orders(
-          id INTEGER PRIMARY KEY,
-          customer_id INTEGER,
-          product_id INTEGER,
-          quantity INTEGER,
-          order_date TEXT,
-          FOREIGN KEY(customer_id) REFERENCES customers(id),
-          FOREIGN KEY(product_id) REFERENCES products(id)
-        );
-        INSERT INTO customers(id,name,region) VALUES
-          (1,'Asha','North'),(2,'Rohan','South'),(3,'Meera','West');
-        INSERT INTO products(id,name,category,price) VALUES
-          (1,'Keyboard','Accessories',1499.0),
-          (2,'Mouse','Accessories',799.0),
-          (3,'Headphones','Audio',2999.0);
-        INSERT INTO orders(id,customer_id,product_id,quantity,order_date) VALUES
-          (1,1,1,1,'2025-01-05'),
-          (2,1,2,2,'2025-02-10'),
-          (3,2,3,1,'2025-03-15'),
-          (4,3,1,3,'2025-04-20');
-        """)
-        conn.commit()
-    else:
-        # default tiny dataset
-        cur.executescript("""
-        CREATE TABLE nums(n INTEGER);
-        INSERT INTO nums(n) VALUES (1),(2),(3),(4),(5);
-        """)
-        conn.commit()
+    """This thread's connection to `dataset` for running user queries."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(dataset)
+    if conn is None:
+        conn = conns[dataset] = _sandboxed(_open(dataset))
+    return conn
+
+class _Budget:
+    """VM-step budget and wall-clock deadline for the statements run on `conn` until
+    close(); once either is used up, the running statement is interrupted. Longer
+    timeouts get a proportionally larger step budget."""
+    def __init__(self, conn: sqlite3.Connection, timeout_sec: float | None = None):
+        self.conn = conn
+        self.timeout_sec = timeout_sec or settings.SQL_TIMEOUT_SEC
+        self._deadline = time.monotonic() + self.timeout_sec
+        max_steps = settings.SQL_MAX_VM_STEPS * max(1, round(self.timeout_sec / settings.SQL_TIMEOUT_SEC))
+        self._max_calls = max(1, max_steps // _PROGRESS_EVERY)
+        self._calls = 0
+        self.exceeded = False
+        conn.set_progress_handler(self._progress, _PROGRESS_EVERY)
+
+    def _progress(self) -> int:
+        self._calls += 1
+        if self._calls > self._max_calls or time.monotonic() > self._deadline:
+            self.exceeded = True
+            return 1
+        return 0
+
+    def failure(self, e: Exception) -> QueryError:
+        if self.exceeded:
+            return QueryTimeout(f"Query exceeded its budget of {self.timeout_sec:g}s")
+        if str(e) == "not authorized":  # from _authorize
+            return QueryError("Only read-only queries are allowed")
+        return QueryError(str(e))
+
+    def close(self) -> None:
+        self.conn.set_progress_handler(None, 0)
+
+    def __enter__(self) -> "_Budget":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class Catalog(NamedTuple):
+    tables: tuple[str, ...]
+    schema: "MappingProxyType[str, tuple[dict, ...]]"  # table -> columns
+
+_catalogs: dict[tuple[str, str], Catalog] = {}  # (dataset, version) -> catalog
+_catalog_lock = threading.Lock()
+
+def catalog(dataset: str) -> Catalog:
+    """Tables and columns of a dataset, read once per dataset version and shared
+    by every caller; never mutate it."""
+    key = (dataset, sql_datasets.version(dataset))
+    found = _catalogs.get(key)
+    if found is not None:
+        return found
+    with _catalog_lock:
+        found = _catalogs.get(key)
+        if found is None:
+            # our own queries: a plain connection, since the authorizer denies pragmas
+            conn = _open(dataset)
+            try:
+                tables = tuple(r[0] for r in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"))
+                schema = {
+                    t: tuple({"cid": r[0], "name": r[1], "type": r[2], "notnull": r[3]}
+                             for r in conn.execute(f"PRAGMA table_info({t})"))
+                    for t in tables
+                }
+            finally:
+                conn.close()
+            found = _catalogs[key] = Catalog(tables, MappingProxyType(schema))
+    return found
 
 def list_datasets() -> List[dict]:
     out = []
-    for name in ["ecommerce", "tiny"]:
-        conn = _connect(name)
-        cur = conn.cursor()
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
-        tables = [r[0] for r in cur.fetchall()]
-        schema = {}
-        for t in tables:
-            cur.execute(f"PRAGMA table_info({t})")
-            cols = [{"cid": r[0], "name": r[1], "type": r[2], "notnull": r[3]} for r in cur.fetchall()]
-            schema[t] = cols
-        out.append({"name": name, "tables": tables, "schema": schema})
+    for name, spec in sql_datasets.SPECS.items():
+        item = {"name": name, "description": spec.description, "version": sql_datasets.version(name),
+                "ready": not spec.scaled or sql_datasets.snapshot_path(name).exists(),
+                "tables": (), "schema": {}}
+        if item["ready"]:  # a dataset still being generated is listed without waiting for it
+            item.update(catalog(name)._asdict())
+        out.append(item)
     return out
 
-def _safe(sql: str) -> None:
-    s = sql.strip()
-    if not s:
-        raise ValueError("Empty SQL")
-    if not re.match(r"^(WITH|SELECT)\b", s, re.I):
-        raise ValueError("Only SELECT or WITH queries are allowed")
-    if FORBIDDEN.search(s):
-        raise ValueError("Query contains forbidden keywords")
-
 def _english(sql: str) -> str:
     # Very small heuristic translator
     s = " ".join(sql.strip().split())
@@ -100,27 +162,279 @@ def _english(sql: str) -> str:
         return f"Selects {cols} from {table} where {where}."
     return f"Selects {cols} from {table}."
 
-def run_query(dataset: str, sql: str, limit: int = 500):
-    _safe(sql)
-    conn = _connect(dataset)
-    cur = conn.cursor()
+# string literals, quoted identifiers and comments, whose whitespace is significant
+_VERBATIM = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|--[^\n]*\n?|/\*.*?\*/)""", re.S)
+
+def normalize_sql(sql: str) -> str:
+    """Whitespace-insensitive form of a query, for cache keys. Only whitespace
+    between tokens is collapsed, so two queries share a form only if they mean
+    the same thing."""
+    parts = _VERBATIM.split(sql)
+    parts[::2] = [re.sub(r"\s+", " ", p) for p in parts[::2]]
+    return "".join(parts).strip().rstrip(";").rstrip()
+
+def strip_trailing(sql: str) -> str:
+    """`sql` without the semicolons and comments after its statement, so that it
+    can be nested as a subquery."""
+    parts = _VERBATIM.split(sql)
+    while parts and (not parts[-1].strip(" \t\r\n;") or parts[-1].startswith(("--", "/*"))):
+        parts.pop()
+    return "".join(parts).rstrip(" \t\r\n;")
+
+def _fingerprint(dataset: str, sql: str) -> str:
+    raw = f"{dataset}\0{sql_datasets.version(dataset)}\0{normalize_sql(sql)}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
 
-    plan = []
+def _encode_cursor(dataset: str, sql: str, offset: int) -> str:
+    raw = json.dumps([_fingerprint(dataset, sql), offset], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, dataset: str, sql: str) -> int:
     try:
-        cur.execute(f"EXPLAIN QUERY PLAN {sql}")
-        plan = [ " ".join(str(x) for x in row) for row in cur.fetchall() ]
-    except Exception as _:
-        plan = ["Plan not available"]
-
-    cur.execute(sql)
-    rows = cur.fetchall()
-    rows = rows[:limit]
-    columns = [d[0] for d in cur.description] if cur.description else []
-    english = _english(sql)
+        fingerprint, offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise QueryError("Invalid cursor")
+    if fingerprint != _fingerprint(dataset, sql) or not isinstance(offset, int) or offset < 0:
+        raise QueryError("Cursor does not match this query")
+    return offset
+
+def _cells(rows: list) -> list:
+    # BLOBs (e.g. from zeroblob) are not JSON; show them as hex
+    return [[v.hex() if isinstance(v, bytes) else v for v in r] for r in rows]
+
+class _PlanCache:
+    """EXPLAIN QUERY PLAN output per (dataset version, normalized SQL)."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, list[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conn: sqlite3.Connection, dataset: str, sql: str) -> list[str]:
+        key = _fingerprint(dataset, sql)
+        with self._lock:
+            plan = self._data.get(key)
+            if plan is not None:
+                self._data.move_to_end(key)
+                return plan
+        with _Budget(conn):
+            try:
+                plan = [" ".join(str(x) for x in row) for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+            except (sqlite3.Error, sqlite3.Warning):
+                return ["Plan not available"]
+        with self._lock:
+            self._data[key] = plan
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return plan
+
+plans = _PlanCache(1024)
+
+# results that can differ between runs over the same snapshot; over-matching only costs a cache miss
+_VOLATILE = re.compile(r"\b(random|randomblob|changes|total_changes|last_insert_rowid|"
+                       r"current_date|current_time|current_timestamp)\b|'now'", re.I)
+
+class _ResultCache:
+    """Pages of query results per (dataset version, normalized SQL, limit, offset).
+
+    Snapshots are immutable, so a page stays valid for as long as its dataset
+    version is current; pages of older versions are never hit again and age out
+    of the LRU. Bounded by entry count and by the JSON size of the rows.
+    """
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[tuple, tuple[int, dict]]" = OrderedDict()  # key -> (size, page)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, page: dict) -> None:
+        if self.max_bytes <= 0:
+            return
+        size = 256 + len(_dumps(page["rows"]))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0]
+            self._data[key] = (size, page)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (evicted, _) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+results = _ResultCache(settings.SQL_RESULT_CACHE_MAX_ENTRIES, settings.SQL_RESULT_CACHE_MAX_BYTES)
+
+def _skip(cur: sqlite3.Cursor, n: int) -> None:
+    while n > 0:
+        got = len(cur.fetchmany(min(n, _FETCH_CHUNK)))
+        if not got:
+            return
+        n -= got
+
+def run_query(dataset: str, sql: str, limit: int = 500, cursor: str | None = None, explain: bool = False):
+    """One page of at most `limit` rows. Rows are streamed from SQLite and the query
+    stops as soon as the page is full; `next_cursor` continues after it. Pages are
+    served from the result cache when the same query was run before."""
+    if not sql.strip():
+        raise QueryError("Empty SQL")
+    if dataset not in sql_datasets.SPECS:
+        raise UnknownDataset(dataset)
+    offset = _decode_cursor(cursor, dataset, sql) if cursor else 0
+    t0 = time.perf_counter()
+
+    key = (dataset, sql_datasets.version(dataset), normalize_sql(sql), limit, offset)
+    page = results.get(key)
+    cached = page is not None
+    if page is None:
+        conn = _connect(dataset)
+        cur = conn.cursor()
+        with _Budget(conn) as budget:
+            try:
+                cur.execute(sql)
+                if cur.description is None:
+                    raise QueryError("Only queries that return rows are allowed")
+                columns = [d[0] for d in cur.description]
+                _skip(cur, offset)
+                rows = cur.fetchmany(limit + 1)
+            except (sqlite3.Error, sqlite3.Warning) as e:  # Warning: more than one statement
+                raise budget.failure(e) from None
+            finally:
+                cur.close()  # finalizes the statement, so rows past this page are never computed
+        page = {"columns": columns, "rows": _cells(rows[:limit]), "truncated": len(rows) > limit}
+        if not _VOLATILE.search(key[2]):
+            results.put(key, page)
     return {
-        "columns": columns,
-        "rows": [list(r) for r in rows],
-        "english": english,
-        "plan": plan,
-        "row_count": len(rows),
+        "columns": page["columns"],
+        "rows": page["rows"],
+        "english": _english(sql),
+        "plan": plans.get(_connect(dataset), dataset, sql) if explain else [],
+        "row_count": len(page["rows"]),
+        "truncated": page["truncated"],
+        "next_cursor": _encode_cursor(dataset, sql, offset + limit) if page["truncated"] else None,
+        "cached": cached,
+        "elapsed_ms": (time.perf_counter() - t0) * 1000.0,
     }
+
+def scan(dataset: str, sql: str, visit: Callable[[list], None], timeout_sec: float | None = None) -> List[str]:
+    """Feeds every row of a query to `visit`, a chunk at a time, without keeping any
+    of them; returns the column names. Time spent in `visit` counts against the
+    query's deadline."""
+    if not sql.strip():
+        raise QueryError("Empty SQL")
+    conn = _connect(dataset)
+    cur = conn.cursor()
+    with _Budget(conn, timeout_sec) as budget:
+        try:
+            cur.execute(sql)
+            if cur.description is None:
+                raise QueryError("Only queries that return rows are allowed")
+            columns = [d[0] for d in cur.description]
+            while rows := cur.fetchmany(_FETCH_CHUNK):
+                visit(rows)
+        except (sqlite3.Error, sqlite3.Warning) as e:
+            raise budget.failure(e) from None
+        finally:
+            cur.close()
+    return columns
+
+def scan_pair(dataset: str, first_sql: str, second_sql: str, visit: Callable[[list, list], bool],
+              timeout_sec: float | None = None) -> None:
+    """Like scan(), for two queries read in lockstep under one budget: `visit` gets
+    the next chunk of each (shorter, or empty, once a query runs out) and returns
+    False to stop early."""
+    conn = _connect(dataset)
+    first, second = conn.cursor(), conn.cursor()
+    with _Budget(conn, timeout_sec) as budget:
+        try:
+            first.execute(first_sql)
+            second.execute(second_sql)
+            while True:
+                a, b = first.fetchmany(_FETCH_CHUNK), second.fetchmany(_FETCH_CHUNK)
+                if not (a or b) or not visit(a, b):
+                    break
+        except (sqlite3.Error, sqlite3.Warning) as e:
+            raise budget.failure(e) from None
+        finally:
+            first.close()
+            second.close()
+
+def export_rows(dataset: str, sql: str) -> Iterator[bytes]:
+    """All rows of a query as NDJSON: a {"columns": [...]} line, one JSON array per
+    row, then a {"row_count", "truncated", "error"} trailer.
+
+    Runs on a connection of its own, since a streaming response pulls each chunk
+    from whichever threadpool thread is free. The query is prepared and its first
+    rows fetched before this returns, so errors in the SQL itself raise QueryError
+    here rather than mid-stream.
+    """
+    if not sql.strip():
+        raise QueryError("Empty SQL")
+    conn = _sandboxed(_open(dataset, check_same_thread=False))
+    budget = _Budget(conn, settings.SQL_EXPORT_TIMEOUT_SEC)
+    try:
+        cur = conn.execute(sql)
+        if cur.description is None:
+            raise QueryError("Only queries that return rows are allowed")
+        first = cur.fetchmany(_FETCH_CHUNK)
+    except BaseException as e:
+        budget.close()
+        conn.close()
+        if isinstance(e, (sqlite3.Error, sqlite3.Warning)):
+            raise budget.failure(e) from None
+        raise
+
+    def lines() -> Iterator[bytes]:
+        count, truncated, error, rows = 0, False, None, first
+        cap = settings.SQL_EXPORT_MAX_ROWS
+        try:
+            yield _dumps({"columns": [d[0] for d in cur.description]}) + b"\n"
+            while rows:
+                rows = rows[:cap - count]
+                count += len(rows)
+                yield b"".join(_dumps(r) + b"\n" for r in _cells(rows))
+                if count >= cap:
+                    truncated = bool(cur.fetchmany(1))
+                    break
+                rows = cur.fetchmany(_FETCH_CHUNK)
+        except (sqlite3.Error, sqlite3.Warning) as e:
+            error = str(budget.failure(e))
+        finally:
+            budget.close()
+            conn.close()
+        yield _dumps({"row_count": count, "truncated": truncated, "error": error}) + b"\n"
+
+    return lines()
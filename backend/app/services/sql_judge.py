@@ -0,0 +1,189 @@
+# backend/app/services/sql_judge.py
+#
+# Judges SQL submissions: the submitted query and the problem's reference query
+# run against the problem's dataset, and their result sets are compared by
+# digest. Rows are hashed as they stream out of SQLite, so neither result is
+# ever sorted or held in memory, whatever its size.
+#
+# A result's digest has two hashes: the sum of its row hashes (mod 2**128), which
+# is the same for any order of the same multiset of rows, and a running hash over
+# the rows in order, used when the problem asks for ORDER BY. The reference
+# query's digest only depends on the dataset version, so it is computed once.
+#
+# A float tolerance cannot be folded into a hash (any rounding grid puts values
+# that are arbitrarily close into different buckets), so when a problem has one
+# and the digests differ in a column holding floats, both queries are run again
+# sorted the same way by SQLite and their rows compared pairwise, |got - want| <=
+# tolerance for numbers and exactly for everything else.
+import hashlib, threading, time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from ..core.config import Settings
+from . import sql_datasets, sql_engine
+
+settings = Settings()
+
+_MOD = 1 << 128
+
+class Digest(NamedTuple):
+    columns: int
+    rows: int
+    bag: int  # order-insensitive
+    seq: str  # order-sensitive
+    floats: frozenset = frozenset()  # columns holding a float in some row, when tracked
+
+def _canonical(value):
+    """Form of a cell that compares equal exactly when the cells should: numbers
+    are compared by value, so 3 and 3.0 match."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+class _Hasher:
+    def __init__(self, track_floats: bool):
+        self.track_floats = track_floats
+        self.rows = 0
+        self.bag = 0
+        self.floats: set[int] = set()
+        self._seq = hashlib.blake2b(digest_size=16)
+
+    def update(self, rows: list) -> None:
+        bag = self.bag
+        for row in rows:
+            # repr of a tuple of str/bytes/int/float/None is unambiguous
+            h = hashlib.blake2b(repr(tuple(_canonical(v) for v in row)).encode(), digest_size=16).digest()
+            bag += int.from_bytes(h, "big")
+            self._seq.update(h)
+            if self.track_floats:
+                self.floats.update(i for i, v in enumerate(row) if type(v) is float)
+        self.bag = bag % _MOD
+        self.rows += len(rows)
+
+    def digest(self, columns: int) -> Digest:
+        return Digest(columns, self.rows, self.bag, self._seq.hexdigest(), frozenset(self.floats))
+
+def digest_query(dataset: str, sql: str, tolerance: float = 0.0) -> Digest:
+    hasher = _Hasher(track_floats=tolerance > 0)
+    columns = sql_engine.scan(dataset, sql, hasher.update, settings.SQL_JUDGE_TIMEOUT_SEC)
+    return hasher.digest(len(columns))
+
+def _close(got, want, tolerance: float) -> bool:
+    if type(got) in (int, float) and type(want) in (int, float):
+        return abs(got - want) <= tolerance
+    return got == want
+
+def _sorted(sql: str, keys: list[int]) -> str:
+    return f"SELECT * FROM ({sql_engine.strip_trailing(sql)}) ORDER BY {', '.join(str(k + 1) for k in keys)}"
+
+def _rows_close(dataset: str, got_sql: str, want_sql: str, tolerance: float) -> bool:
+    """Whether the two queries return the same rows in the same order, up to `tolerance`."""
+    same = True
+    def visit(got: list, want: list) -> bool:
+        nonlocal same
+        same = len(got) == len(want) and all(
+            _close(g, w, tolerance) for got_row, want_row in zip(got, want) for g, w in zip(got_row, want_row)
+        )
+        return same
+    sql_engine.scan_pair(dataset, got_sql, want_sql, visit, 2 * settings.SQL_JUDGE_TIMEOUT_SEC)
+    return same
+
+def _compare_tolerant(dataset: str, code: str, reference_sql: str, got: Digest, want: Digest,
+                      ordered: bool, tolerance: float) -> Optional[str]:
+    """_compare for digests that differ when the problem has a float tolerance."""
+    floats = got.floats | want.floats
+    if not floats:
+        return _compare(got, want, ordered)
+    # exact columns first, so rows that only differ within the tolerance sort alike
+    keys = [i for i in range(want.columns) if i not in floats] + sorted(floats)
+    if not _rows_close(dataset, _sorted(code, keys), _sorted(reference_sql, keys), tolerance):
+        return "Rows differ from the expected result"
+    if ordered and not _rows_close(dataset, code, reference_sql, tolerance):
+        return "Rows match but are not in the expected order"
+    return None
+
+class _ReferenceCache:
+    """Digests of reference queries per (dataset version, normalized SQL, tolerance)."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, Digest]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataset: str, sql: str, tolerance: float) -> Digest:
+        key = (dataset, sql_datasets.version(dataset), sql_engine.normalize_sql(sql), tolerance)
+        with self._lock:
+            digest = self._data.get(key)
+            if digest is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return digest
+            self.misses += 1
+        digest = digest_query(dataset, sql, tolerance)
+        with self._lock:
+            self._data[key] = digest
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return digest
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+references = _ReferenceCache(1024)
+
+def fingerprint(dataset: str, reference_sql: str, ordered: bool, tolerance: float) -> str:
+    """Identifies what a submission is judged against, for verdict cache keys."""
+    raw = f"{dataset}\0{sql_datasets.version(dataset)}\0{sql_engine.normalize_sql(reference_sql)}\0{int(ordered)}\0{tolerance!r}"
+    return "sql:" + hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+def _compare(got: Digest, want: Digest, ordered: bool) -> Optional[str]:
+    """Why `got` is not the expected result, or None when it is."""
+    if got.columns != want.columns:
+        return f"Expected {want.columns} columns, got {got.columns}"
+    if got.rows != want.rows:
+        return f"Expected {want.rows} rows, got {got.rows}"
+    if got.bag != want.bag:
+        return "Rows differ from the expected result"
+    if ordered and got.seq != want.seq:
+        return "Rows match but are not in the expected order"
+    return None
+
+def judge_sql(code: str, dataset: str, reference_sql: str, ordered: bool = False, tolerance: float = 0.0,
+              on_result: Optional[Callable[[dict], None]] = None):
+    """
+    Runs `code` and the reference query against `dataset` and compares the results.
+    Returns (overall, results, total_ms) like runner.judge_python, with a single
+    test result. Column names are not compared, only the number of columns, so
+    aliases do not matter. A failing reference query raises QueryError.
+    """
+    want = references.get(dataset, reference_sql, tolerance)
+    t0 = time.perf_counter()
+    r = {"idx": 1, "passed": False, "status": "WA", "stdout": "", "stderr": "",
+         "runtime_ms": None, "cpu_ms": None, "memory_kb": None}
+    try:
+        got = digest_query(dataset, code, tolerance)
+        why = _compare(got, want, ordered)
+        if why and tolerance > 0 and got.columns == want.columns and got.rows == want.rows:
+            why = _compare_tolerant(dataset, code, reference_sql, got, want, ordered, tolerance)
+    except sql_engine.QueryTimeout as e:
+        r.update(status="TLE", stderr=str(e))
+    except sql_engine.QueryError as e:
+        r.update(status="RTE", stderr=str(e))
+    else:
+        r["stdout"] = f"{got.rows} rows, {got.columns} columns"
+        r["stderr"] = why or ""
+        r["passed"] = not r["stderr"]
+        r["status"] = "OK" if r["passed"] else "WA"
+    r["runtime_ms"] = (time.perf_counter() - t0) * 1000.0
+    if on_result is not None:
+        on_result(r)
+    return ("Accepted" if r["passed"] else "Wrong Answer"), [r], r["runtime_ms"]
@@ -0,0 +1,122 @@
+# backend/app/services/testcase_bundles.py
+#
+# Per-problem cache of testcases. A bundle is an immutable snapshot of a problem's
+# testcases at one `Problem.testcase_version`; writes bump the version, so a stale
+# bundle is never served. Large inputs can be spilled to files that the runner
+# feeds straight to stdin and compares against without loading them.
+import os, shutil, tempfile, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings
+from ..models.problem import Problem
+from ..models.testcase import TestCase
+
+settings = Settings()
+
+class Bundle(NamedTuple):
+    problem_id: int
+    version: int
+    # (input, expected); each is a str, or a Path when it was spilled to disk
+    tests: tuple[tuple[str | Path, str | Path], ...]
+    size: int
+
+def _spill(problem_id: int, version: int, rows: list[TestCase]) -> dict[str, Path]:
+    base = Path(settings.TESTCASE_BUNDLE_DIR).resolve() / str(problem_id)
+    final = base / f"v{version}"
+    big = {}
+    for t in rows:
+        for ext, text in (("in", t.input_text), ("out", t.expected_output)):
+            if len(text) >= settings.TESTCASE_SPILL_BYTES:
+                big[f"{t.id}.{ext}"] = text
+    if not big:
+        return {}
+    if not final.exists():
+        base.mkdir(parents=True, exist_ok=True)
+        # mkdtemp makes it 0700: runs that drop to JUDGE_RUN_UID cannot read the expected outputs
+        tmp = Path(tempfile.mkdtemp(dir=base, prefix=".tmp-"))
+        for name, text in big.items():
+            (tmp / name).write_text(text, encoding="utf-8")
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # another worker won the race
+        # keep the previous version for runs that already hold its paths
+        for old in base.glob("v*"):
+            if old.name[1:].isdigit() and int(old.name[1:]) < version - 1:
+                shutil.rmtree(old, ignore_errors=True)
+    return {name: final / name for name in big}
+
+def _load(db: Session, problem_id: int, version: int) -> Bundle:
+    rows = db.query(TestCase).filter(TestCase.problem_id == problem_id).order_by(TestCase.id.asc()).all()
+    spilled = _spill(problem_id, version, rows) if settings.TESTCASE_BUNDLE_DIR else {}
+    tests = tuple(
+        (spilled.get(f"{t.id}.in", t.input_text), spilled.get(f"{t.id}.out", t.expected_output)) for t in rows
+    )
+    size = sum(0 if isinstance(x, Path) else len(x) for pair in tests for x in pair)
+    return Bundle(problem_id, version, tests, size)
+
+class BundleCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[int, Bundle]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, problem_id: int, version: int) -> Bundle:
+        with self._lock:
+            b = self._data.get(problem_id)
+            if b is not None and b.version == version:
+                self._data.move_to_end(problem_id)
+                self.hits += 1
+                return b
+            self.misses += 1
+        for _ in range(3):
+            b = _load(db, problem_id, version)
+            # a testcase may have been written while we were reading the rows
+            current = db.query(Problem.testcase_version).filter(Problem.id == problem_id).scalar()
+            if current == version:
+                break
+            version = current
+        self._store(b)
+        return b
+
+    def _store(self, b: Bundle) -> None:
+        with self._lock:
+            old = self._data.pop(b.problem_id, None)
+            if old is not None:
+                self._bytes -= old.size
+                if old.version > b.version:
+                    b = old
+            if b.size > self.max_bytes:
+                return
+            self._data[b.problem_id] = b
+            self._bytes += b.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def invalidate(self, problem_id: int) -> None:
+        with self._lock:
+            old = self._data.pop(problem_id, None)
+            if old is not None:
+                self._bytes -= old.size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "problems": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+cache = BundleCache(settings.TESTCASE_BUNDLE_CACHE_BYTES)
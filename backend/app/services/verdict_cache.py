@@ -0,0 +1,92 @@
+# backend/app/services/verdict_cache.py
+#
+# Content-addressed cache of judge verdicts. Identical code judged against the
+# same testcase set gives the same verdict, so resubmissions skip the runner.
+import hashlib, threading
+from collections import OrderedDict
+from typing import Optional
+
+from ..core.config import Settings
+
+settings = Settings()
+
+def normalize_code(code: str) -> str:
+    # only changes that cannot alter behaviour: line endings and trailing blank space
+    return code.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+
+def make_key(code: str, language: str, timeout_sec: float, problem_id: int, fingerprint: str, options: str = "") -> str:
+    h = hashlib.sha256()
+    for part in (language, f"{timeout_sec:.3f}", str(problem_id), fingerprint, options):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    h.update(normalize_code(code).encode("utf-8"))
+    return h.hexdigest()
+
+def _size(results: list[dict]) -> int:
+    return 256 + sum(200 + len(r.get("stdout") or "") + len(r.get("stderr") or "") for r in results)
+
+class VerdictCache:
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, tuple[int, int, tuple]]" = OrderedDict()  # key -> (problem_id, size, verdict)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[tuple[str, list[dict], float]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        status, results, total_ms = entry[2]
+        return status, [dict(r) for r in results], total_ms
+
+    def put(self, key: str, problem_id: int, status: str, results: list[dict], total_ms: float) -> None:
+        size = _size(results)
+        if size > self.max_bytes:
+            return
+        verdict = (status, tuple(dict(r) for r in results), total_ms)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (problem_id, size, verdict)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted, _) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def invalidate_problem(self, problem_id: int) -> int:
+        with self._lock:
+            stale = [k for k, (pid, _, _) in self._data.items() if pid == problem_id]
+            for k in stale:
+                self._bytes -= self._data.pop(k)[1]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+cache = VerdictCache(settings.VERDICT_CACHE_MAX_ENTRIES, settings.VERDICT_CACHE_MAX_BYTES)
@@ -0,0 +1,176 @@
+"""Load test of the read-heavy endpoints with the sync and the async database layer.
+
+Seeds a scratch database, starts the API under uvicorn once with DB_ASYNC=0 and
+once with DB_ASYNC=1, and drives the problem and submission read endpoints with
+a fixed number of concurrent keep-alive connections, reporting throughput and
+latency for each mode.
+
+    python bench/load_test.py                          # temp SQLite file (async mode needs aiosqlite)
+    python bench/load_test.py --concurrency 64 --duration 20
+    python bench/load_test.py --url postgresql+psycopg2://...   # empty scratch DB; async mode needs asyncpg
+"""
+import argparse, asyncio, json, os, random, statistics, subprocess, sys, tempfile, time
+import urllib.error, urllib.parse, urllib.request
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND)
+
+WORDS = "array tree graph string sum search sort window stack queue heap matrix path prefix".split()
+
+def seed(url: str, problems: int) -> None:
+    os.environ["DATABASE_URL"] = url
+    from sqlalchemy import create_engine
+    from app.db.session import Base
+    from app.models.problem import Problem
+    from app.models import user, submission, submission_test, perf_bucket, testcase  # noqa: F401  (register tables)
+
+    rng = random.Random(5)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Problem.__table__.insert(), [
+            {
+                "title": f"{' '.join(rng.sample(WORDS, 3)).title()} {i}",
+                "slug": f"p-{i}",
+                "body": " ".join(rng.choices(WORDS, k=60)),
+                "domain": rng.choice(("dsa", "algo", "sql")),
+                "difficulty": rng.choice(("easy", "medium", "hard")),
+            }
+            for i in range(1, problems + 1)
+        ])
+    engine.dispose()
+
+def seed_submissions(url: str, user_id: int, problems: int, submissions: int) -> None:
+    from sqlalchemy import create_engine
+    from app.models.submission import Submission
+
+    rng = random.Random(6)
+    attempts: dict[int, int] = {}
+    rows = []
+    for _ in range(submissions):
+        pid = rng.randint(1, min(problems, 20))
+        attempts[pid] = attempts.get(pid, 0) + 1
+        rows.append({
+            "problem_id": pid, "user_id": user_id, "attempt_no": attempts[pid], "language": "python",
+            "code": "print(int(input())*2)\n" * 20, "status": "Accepted", "runtime_ms": 12.0,
+            "passed_count": 5, "total_count": 5,
+        })
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(Submission.__table__.insert(), rows)
+    engine.dispose()
+
+def start_server(url: str, port: int, db_async: bool) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=url, DB_ASYNC="1" if db_async else "0")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env,
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+def login(port: int) -> tuple[str, int]:
+    base = f"http://127.0.0.1:{port}"
+    creds = {"email": "load@example.com", "password": "secret123"}
+    req = urllib.request.Request(f"{base}/auth/register", json.dumps(creds).encode(), {"Content-Type": "application/json"})
+    try:
+        urllib.request.urlopen(req)
+    except urllib.error.HTTPError:
+        pass  # already registered by the previous run
+    form = urllib.parse.urlencode({"username": creds["email"], "password": creds["password"]}).encode()
+    token = json.load(urllib.request.urlopen(f"{base}/auth/login", form))["access_token"]
+    me = urllib.request.Request(f"{base}/users/me", headers={"Authorization": f"Bearer {token}"})
+    return token, json.load(urllib.request.urlopen(me))["id"]
+
+def paths(problems: int) -> list[str]:
+    rng = random.Random(9)
+    out = []
+    for _ in range(200):
+        pid = rng.randint(1, min(problems, 20))
+        out += [
+            f"/problems/search?q={rng.choice(WORDS)}&limit=20",
+            f"/problems/search?sort=created_desc&limit=20&domain={rng.choice(('dsa', 'algo', 'sql'))}",
+            f"/problems/{pid}/stats",
+            "/submissions?limit=20",
+            f"/submissions/history?problem_id={pid}",
+        ]
+    return out
+
+async def _get(reader, writer, path: str, token: str) -> int:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n\r\n".encode())
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def drive(port: int, token: str, targets: list[str], concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    stop = time.perf_counter() + duration
+
+    async def client(i: int):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        n = i
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            if await _get(reader, writer, targets[n % len(targets)], token) != 200:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            n += concurrency
+        writer.close()
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "errors": errors,
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default=None, help="database URL; defaults to a temporary SQLite file")
+    ap.add_argument("--problems", type=int, default=5000)
+    ap.add_argument("--submissions", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    url = args.url or f"sqlite:///{tempfile.mkstemp(suffix='.db')[1]}"
+    seed(url, args.problems)
+    targets = paths(args.problems)
+    results = {}
+    for mode in ("sync", "async"):
+        proc = start_server(url, args.port, mode == "async")
+        try:
+            token, user_id = login(args.port)
+            if mode == "sync":
+                seed_submissions(url, user_id, args.problems, args.submissions)
+            asyncio.run(drive(args.port, token, targets, args.concurrency, 2.0))  # warm caches and the pool
+            results[mode] = asyncio.run(drive(args.port, token, targets, args.concurrency, args.duration))
+        finally:
+            proc.terminate()
+            proc.wait()
+        r = results[mode]
+        print(f"{mode:>5}: {r['rps']:8.1f} req/s   p50 {r['p50_ms']:7.1f} ms   p99 {r['p99_ms']:7.1f} ms   "
+              f"{r['requests']} requests, {r['errors']} errors")
+    print(f"async/sync throughput: {results['async']['rps'] / results['sync']['rps']:.2f}x")
+    if not args.url:
+        os.unlink(url[len("sqlite:///"):])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Login throughput under concurrent load, with bcrypt inline and on the hashing pool.
+
+Starts the API under uvicorn (login/register rate limits lifted for the run),
+registers one user, then fires concurrent logins for a fixed time while a probe
+requests /health every 50 ms. Reports logins/s, login latency, 503 rejections
+and the probe latency, which shows whether hashing starves other endpoints.
+
+    python bench/login_throughput.py
+    python bench/login_throughput.py --concurrency 64 --rounds 10 --workers 0 2
+"""
+import argparse, asyncio, json, os, statistics, subprocess, sys, tempfile, time
+import urllib.error, urllib.parse, urllib.request
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+
+BOOT = (
+    "from app.core.config import Settings\n"
+    "Settings.RL_AUTH_LOGIN = Settings.RL_AUTH_REGISTER = (10**9, 1)\n"
+    "import uvicorn\n"
+    "uvicorn.run('app.main:app', port={port}, log_level='warning')\n"
+)
+EMAIL, PASSWORD = "bench@example.com", "secret123"
+
+def create_schema(url: str) -> None:
+    os.environ["DATABASE_URL"] = url
+    sys.path.insert(0, BACKEND)
+    from sqlalchemy import create_engine
+    from app.db.session import Base
+    from app.models import user, problem, submission, submission_test, perf_bucket, testcase  # noqa: F401  (register tables)
+    Base.metadata.create_all(create_engine(url))
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, "-c", BOOT.format(port=port)], cwd=BACKEND, env=dict(os.environ, **env))
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+def register(port: int) -> None:
+    body = json.dumps({"email": EMAIL, "password": PASSWORD}).encode()
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/auth/register", body, {"Content-Type": "application/json"})
+    try:
+        urllib.request.urlopen(req)
+    except urllib.error.HTTPError:
+        pass  # already registered
+
+async def _request(reader, writer, method: str, path: str, body: bytes = b"") -> int:
+    head = f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n"
+    if body:
+        head += "Content-Type: application/x-www-form-urlencoded\r\n"
+    writer.write(head.encode() + b"\r\n" + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def drive(port: int, concurrency: int, duration: float) -> dict:
+    form = urllib.parse.urlencode({"username": EMAIL, "password": PASSWORD}).encode()
+    stop = time.perf_counter() + duration
+    logins: list[float] = []
+    probes: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            status = await _request(reader, writer, "POST", "/auth/login", form)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                logins.append((time.perf_counter() - t0) * 1000.0)
+            else:
+                await asyncio.sleep(0.05)  # honour the 503's Retry-After, briefly
+        writer.close()
+
+    async def probe():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            await _request(reader, writer, "GET", "/health")
+            probes.append((time.perf_counter() - t0) * 1000.0)
+            await asyncio.sleep(0.05)
+        writer.close()
+
+    await asyncio.gather(probe(), *(client() for _ in range(concurrency)))
+    logins.sort()
+    probes.sort()
+    return {
+        "logins_per_sec": len(logins) / duration,
+        "login_p50_ms": statistics.median(logins) if logins else 0.0,
+        "statuses": statuses,
+        "probe_p50_ms": statistics.median(probes),
+        "probe_max_ms": probes[-1],
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS")
+    ap.add_argument("--workers", type=int, nargs="+", default=[0, os.cpu_count() or 1],
+                    help="PASSWORD_HASH_WORKERS values to compare; 0 hashes inline in the threadpool")
+    ap.add_argument("--port", type=int, default=8766)
+    args = ap.parse_args()
+
+    db = tempfile.mkstemp(suffix=".db")[1]
+    create_schema(f"sqlite:///{db}")
+    for workers in args.workers:
+        env = {
+            "DATABASE_URL": f"sqlite:///{db}",
+            "BCRYPT_ROUNDS": str(args.rounds),
+            "PASSWORD_HASH_WORKERS": str(workers),
+        }
+        proc = start_server(args.port, env)
+        try:
+            register(args.port)
+            asyncio.run(drive(args.port, 2, 1.0))  # start the pool
+            r = asyncio.run(drive(args.port, args.concurrency, args.duration))
+        finally:
+            proc.terminate()
+            proc.wait()
+        label = "inline" if workers <= 0 else f"pool x{workers}"
+        print(f"{label:>10}: {r['logins_per_sec']:6.1f} logins/s   login p50 {r['login_p50_ms']:7.1f} ms   "
+              f"statuses {r['statuses']}   /health p50 {r['probe_p50_ms']:6.1f} ms max {r['probe_max_ms']:7.1f} ms")
+    os.unlink(db)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Payload size and serialization time of large API responses.
+
+Builds realistic submission results (every test near MAX_OUTPUT_CHARS of numeric
+stdout plus a traceback on stderr) and a testcase listing, then reports render
+time with the stdlib JSON response and the orjson one, and body size and
+compression time for identity, gzip and (when installed) brotli.
+
+    python bench/response_size.py
+    python bench/response_size.py --tests 50 --repeat 200
+"""
+import argparse, os, random, sys, time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.core import compression
+from app.core.responses import ORJSONResponse
+from app.schemas.submission import SubmissionWithResults
+from app.schemas.testcase import TestCaseRead
+from app.services.runner import MAX_OUTPUT_CHARS
+
+TRACEBACK = (
+    "Traceback (most recent call last):\n"
+    '  File "main.py", line 14, in <module>\n'
+    "    print(solve(list(map(int, input().split()))))\n"
+    '  File "main.py", line 9, in solve\n'
+    "    return best[n]\n"
+    "IndexError: list index out of range\n"
+)
+
+def _numbers(rng: random.Random, chars: int) -> str:
+    out, size = [], 0
+    while size < chars:
+        line = " ".join(str(rng.randint(-10**6, 10**6)) for _ in range(rng.randint(1, 12)))
+        out.append(line)
+        size += len(line) + 1
+    return "\n".join(out)[:chars]
+
+def submission(rng: random.Random, tests: int) -> dict:
+    return SubmissionWithResults(
+        id=1, problem_id=7, user_id=3, attempt_no=4, language="python", status="Wrong Answer",
+        runtime_ms=41.5, cpu_ms=38.0, memory_kb=10240, passed_count=tests // 2, total_count=tests,
+        created_at=datetime(2026, 10, 18, 12, 0, 0),
+        results=[
+            {"idx": i, "passed": i % 2 == 0, "status": "Accepted" if i % 2 == 0 else "Wrong Answer",
+             "stdout": _numbers(rng, MAX_OUTPUT_CHARS), "stderr": TRACEBACK if i % 5 == 4 else "",
+             "runtime_ms": rng.uniform(5, 80), "cpu_ms": rng.uniform(5, 70), "memory_kb": rng.randint(8000, 20000)}
+            for i in range(tests)
+        ],
+    )
+
+def testcases(rng: random.Random, count: int) -> list:
+    return [TestCaseRead(id=i, problem_id=7, input_text=_numbers(rng, 2000), expected_output=_numbers(rng, 200))
+            for i in range(1, count + 1)]
+
+def _time_ms(fn, repeat: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000.0
+
+def report(name: str, model, repeat: int) -> None:
+    content = jsonable_encoder(model)  # what FastAPI hands to the response class
+    std_ms = _time_ms(lambda: JSONResponse(content), repeat)
+    fast_ms = _time_ms(lambda: ORJSONResponse(content), repeat)
+    body = ORJSONResponse(content).body
+    print(f"{name}: {len(body) / 1024:8.1f} KiB   render stdlib {std_ms:6.2f} ms   orjson {fast_ms:6.2f} ms "
+          f"({std_ms / fast_ms:.1f}x)")
+    codings = ["gzip"] + (["br"] if compression.brotli else [])
+    for coding in codings:
+        ms = _time_ms(lambda: compression.compress(body, coding), max(1, repeat // 10))
+        size = len(compression.compress(body, coding))
+        print(f"  {coding:>4}: {size / 1024:8.1f} KiB ({size / len(body):5.1%})   compress {ms:6.2f} ms")
+    if not compression.brotli:
+        print("    br: skipped (brotli not installed)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tests", type=int, default=20, help="tests per submission")
+    ap.add_argument("--testcases", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=100)
+    args = ap.parse_args()
+
+    rng = random.Random(4)
+    report(f"submission ({args.tests} tests)", submission(rng, args.tests), args.repeat)
+    report(f"testcases ({args.testcases})", testcases(rng, args.testcases), args.repeat)
+
+if __name__ == "__main__":
+    main()
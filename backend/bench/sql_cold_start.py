@@ -0,0 +1,46 @@
+"""Cold start of SQL playground datasets: building a snapshot vs opening one.
+
+Builds every dataset's snapshot into a scratch directory (timing generation),
+then measures, per dataset, how long a fresh connection takes to open the
+snapshot and answer a first query, and a warm full scan of its largest table.
+
+    python bench/sql_cold_start.py
+    python bench/sql_cold_start.py --rows 10000000
+"""
+import argparse, os, shutil, sys, tempfile, time
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000, help="SQL_DATASET_ROWS")
+    ap.add_argument("--dir", default=None, help="snapshot directory; defaults to a temp dir removed afterwards")
+    args = ap.parse_args()
+
+    scratch = args.dir or tempfile.mkdtemp(prefix="sql-bench-")
+    os.environ.update(SQL_DATASET_DIR=scratch, SQL_DATASET_ROWS=str(args.rows))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from app.services import sql_datasets, sql_engine
+
+    try:
+        for name in sql_datasets.SPECS:
+            t0 = time.perf_counter()
+            path = sql_datasets.ensure_snapshot(name)
+            build_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            conn = sql_engine._open(name)
+            tables = [t for (t,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            first_ms = (time.perf_counter() - t0) * 1000.0
+            t0 = time.perf_counter()
+            table, count = max(((t, conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0]) for t in tables),
+                               key=lambda tc: tc[1])
+            scan_ms = (time.perf_counter() - t0) * 1000.0
+            conn.close()
+            print(f"{name:>10}: {path.stat().st_size / 2**20:7.1f} MiB   build {build_s:6.2f} s   "
+                  f"open + first query {first_ms:6.2f} ms   count(*) of every table {scan_ms:7.1f} ms "
+                  f"(largest: {table}, {count} rows)")
+    finally:
+        if not args.dir:
+            shutil.rmtree(scratch)
+
+if __name__ == "__main__":
+    main()
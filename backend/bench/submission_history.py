@@ -0,0 +1,151 @@
+"""Benchmark for the submission history queries, with and without the composite indexes.
+
+Seeds a scratch database with users, problems and submissions, then times the
+queries list_submissions, list_history and diff_submissions actually run (first
+pages of at most `limit` rows, the history columns only, single-row diff
+lookups) with the single-column indexes of the initial schema ("before") and the
+current composite indexes ("after"), printing each query plan.
+
+    python bench/submission_history.py                      # 1M rows in a temp SQLite file
+    python bench/submission_history.py --rows 200000 --repeat 50
+    python bench/submission_history.py --url postgresql+psycopg2://...   # must be an empty scratch DB
+"""
+import argparse, os, random, statistics, sys, tempfile, time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, load_only
+
+from app.db.session import Base
+from app.models.user import User
+from app.models.problem import Problem
+from app.models.submission import Submission
+from app.models import submission_test, perf_bucket  # noqa: F401  (register tables)
+
+NEW_INDEXES = {
+    "uq_submissions_user_problem_attempt": "UNIQUE INDEX {} ON submissions (user_id, problem_id, attempt_no)",
+    "ix_submissions_user_id_id": "INDEX {} ON submissions (user_id, id)",
+    "ix_submissions_user_problem_id": "INDEX {} ON submissions (user_id, problem_id, id)",
+}
+OLD_INDEXES = {"ix_submissions_user_id": "INDEX {} ON submissions (user_id)"}
+
+def user_weights(users: int) -> list[float]:
+    # a few very active users own most submissions, like a real judge
+    return [1.0 / (i ** 1.1) for i in range(1, users + 1)]
+
+def seed(engine, rows: int, users: int, problems: int) -> None:
+    rng = random.Random(7)
+    weights = user_weights(users)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"email": f"u{i}@bench.local", "hashed_password": "x", "is_active": True} for i in range(1, users + 1)
+        ])
+        conn.execute(Problem.__table__.insert(), [
+            {"title": f"Problem {i}", "slug": f"p-{i}", "body": "bench", "domain": "dsa", "difficulty": "easy"}
+            for i in range(1, problems + 1)
+        ])
+    attempts: dict[tuple[int, int], int] = {}
+    batch, t0 = 20000, time.perf_counter()
+    for lo in range(0, rows, batch):
+        n = min(batch, rows - lo)
+        pairs = [(u, rng.randint(1, problems)) for u in rng.choices(range(1, users + 1), weights, k=n)]
+        chunk = []
+        for i, pair in enumerate(pairs):
+            attempts[pair] = attempts.get(pair, 0) + 1
+            chunk.append({
+                "user_id": pair[0],
+                "problem_id": pair[1],
+                "attempt_no": attempts[pair],
+                "language": "python",
+                "code": "print(int(input())*2)",
+                "status": rng.choice(("Accepted", "Wrong Answer")),
+                "passed_count": 1,
+                "total_count": 2,
+                "created_at": start + timedelta(seconds=(lo + i) * 7),
+            })
+        with engine.begin() as conn:
+            conn.execute(Submission.__table__.insert(), chunk)
+    print(f"seeded {rows} submissions in {time.perf_counter() - t0:.1f}s")
+
+def set_indexes(engine, create: dict, drop: dict) -> None:
+    with engine.begin() as conn:
+        for name in drop:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for name in create:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for name, ddl in create.items():
+            conn.execute(text("CREATE " + ddl.format(name)))
+        conn.execute(text("ANALYZE"))
+
+def queries(db: Session, user_id: int, problem_id: int, limit: int = 50) -> dict:
+    """The ORM queries issued by the history endpoints in app/routers/submissions.py."""
+    mine = db.query(Submission).filter(Submission.user_id == user_id)
+    attempts = db.query(Submission.id, Submission.attempt_no).filter(
+        Submission.user_id == user_id, Submission.problem_id == problem_id)
+    return {
+        "list_submissions": mine.order_by(Submission.id.desc()).limit(limit),
+        "list_submissions?problem_id": mine.filter(Submission.problem_id == problem_id)
+                                           .order_by(Submission.id.desc()).limit(limit),
+        "list_history": mine.options(load_only(
+            Submission.id, Submission.problem_id, Submission.status, Submission.passed_count,
+            Submission.total_count, Submission.created_at, Submission.attempt_no,
+        )).filter(Submission.problem_id == problem_id).order_by(Submission.attempt_no.asc()),
+        "diff (latest attempt)": attempts.order_by(Submission.attempt_no.desc()).limit(1),
+    }
+
+def explain(db: Session, query) -> str:
+    sql = str(query.statement.compile(db.bind, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if db.bind.dialect.name == "sqlite" else "EXPLAIN "
+    return "\n".join("    " + " ".join(str(c) for c in row) for row in db.execute(text(prefix + sql)))
+
+def measure(engine, label: str, pairs: list[tuple[int, int]], limit: int) -> dict:
+    print(f"\n== {label}")
+    timings = {}
+    with Session(engine) as db:
+        for name, query in queries(db, *pairs[0], limit).items():
+            print(f"  {name}\n{explain(db, query)}")
+        for user_id, problem_id in pairs:
+            for name, query in queries(db, user_id, problem_id, limit).items():
+                t0 = time.perf_counter()
+                query.all()
+                timings.setdefault(name, []).append((time.perf_counter() - t0) * 1000.0)
+                db.expunge_all()
+    for name, ms in timings.items():
+        ms.sort()
+        print(f"  {name:<28} p50 {statistics.median(ms):8.2f} ms   p95 {ms[int(len(ms) * 0.95) - 1]:8.2f} ms")
+    return {name: statistics.median(ms) for name, ms in timings.items()}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default=None, help="database URL; defaults to a temporary SQLite file")
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--problems", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=200, help="(user, problem) pairs timed per phase")
+    ap.add_argument("--limit", type=int, default=50, help="page size, as list_submissions' default")
+    args = ap.parse_args()
+
+    url = args.url or f"sqlite:///{tempfile.mkstemp(suffix='.db')[1]}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    seed(engine, args.rows, args.users, args.problems)
+
+    rng = random.Random(11)
+    owners = rng.choices(range(1, args.users + 1), user_weights(args.users), k=args.repeat)
+    pairs = [(u, rng.randint(1, args.problems)) for u in owners]
+    set_indexes(engine, OLD_INDEXES, NEW_INDEXES)
+    before = measure(engine, "before: single-column indexes", pairs, args.limit)
+    set_indexes(engine, NEW_INDEXES, OLD_INDEXES)
+    after = measure(engine, "after: composite indexes", pairs, args.limit)
+
+    print("\nspeedup (p50)")
+    for name in before:
+        print(f"  {name:<28} {before[name] / after[name]:6.1f}x")
+    if not args.url:
+        os.unlink(url[len("sqlite:///"):])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import importlib, itertools, os, pkgutil, sys, tempfile
+
+import pytest
+
+# settings are read at import time, so the environment is set before any app module loads
+_tmp = tempfile.mkdtemp(prefix="judge-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/app.db")
+os.environ.setdefault("SQL_DATASET_DIR", os.path.join(_tmp, "sql_datasets"))
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("SQL_PREBUILD", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_titles = itertools.count(1)
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app import models
+    from app.db.session import Base, engine
+    from app.main import app
+
+    for m in pkgutil.iter_modules(models.__path__):
+        importlib.import_module(f"app.models.{m.name}")
+    Base.metadata.create_all(engine)
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture(scope="session")
+def auth(client):
+    client.post("/auth/register", json={"email": "tester@example.com", "password": "secret123"})
+    r = client.post("/auth/login", data={"username": "tester@example.com", "password": "secret123"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+@pytest.fixture
+def db(client):
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def problem(db):
+    """A fresh problem whose tests double the input, for n = 1..3."""
+    from app.models.problem import Problem
+    from app.models.testcase import TestCase
+
+    n = next(_titles)
+    p = Problem(title=f"Double {n}", slug=f"double-{n}", body="Print twice the number.", domain="dsa", difficulty="easy")
+    db.add(p)
+    db.flush()
+    db.add_all(TestCase(problem_id=p.id, input_text=str(i), expected_output=str(2 * i)) for i in range(1, 4))
+    db.commit()
+    return p
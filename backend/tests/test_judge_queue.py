@@ -0,0 +1,58 @@
+import threading, time
+
+import pytest
+
+from app.models.submission import Submission
+from app.routers import submissions
+from app.services.judge_queue import Claimed
+
+GOOD = "print(int(input()) * 2)"
+
+def _queued(db, problem, code=GOOD) -> Submission:
+    # what a worker that died before judging leaves behind
+    sub = Submission(problem_id=problem.id, user_id=None, language="python", code=code, status="Queued",
+                     total_count=3)
+    db.add(sub)
+    db.commit()
+    return sub
+
+def _wait_judged(db, sub: Submission, timeout: float = 10.0) -> str:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.expire_all()
+        if db.get(Submission, sub.id).status not in ("Queued", "Running"):
+            break
+        time.sleep(0.05)
+    return db.get(Submission, sub.id).status
+
+def test_queued_rows_are_judged_after_a_restart(db, problem):
+    sub = _queued(db, problem)
+    assert submissions.resume_queued() >= 1
+    assert _wait_judged(db, sub) == "Accepted"
+
+def test_a_row_is_judged_once_when_every_worker_queues_it(db, problem):
+    sub = _queued(db, problem)
+    total, fingerprint, judge = submissions._judge_for(db, problem, "python", GOOD)
+    # the same row queued by two worker processes: whichever runs second finds it claimed
+    first, second = (submissions._queued_job(sub.id, total, judge, "key") for _ in range(2))
+    assert first.fn(first)["status"] == "Accepted"
+    with pytest.raises(Claimed):
+        second.fn(second)
+
+def test_stream_follows_a_row_judged_elsewhere(client, auth, db, problem):
+    r = client.post("/submissions?wait=true", json={"problem_id": problem.id, "language": "python", "code": GOOD + "\n"},
+                    headers=auth)
+    sub = db.get(Submission, r.json()["id"])
+    sub.status = "Running"  # as if another worker process had claimed it
+    db.commit()
+
+    def finish():
+        time.sleep(0.3)
+        sub.status = "Accepted"
+        db.commit()
+
+    threading.Thread(target=finish).start()
+    with client.stream("GET", f"/submissions/{sub.id}/events", headers=auth) as stream:
+        body = "".join(stream.iter_text())
+    assert body.startswith("event: done")
+    assert '"status": "Accepted"' in body
@@ -0,0 +1,31 @@
+import time
+
+from app.services import perf_index
+
+GOOD = "print(int(input()) * 2)"
+
+def _submit(client, headers, problem, code, wait=True):
+    r = client.post(f"/submissions?wait={str(wait).lower()}",
+                    json={"problem_id": problem.id, "language": "python", "code": code}, headers=headers)
+    assert r.status_code in (200, 202), r.text
+    sid = r.json()["id"]
+    while client.get(f"/submissions/{sid}", headers=headers).json()["status"] in ("Queued", "Running"):
+        time.sleep(0.05)
+    return sid
+
+def _accepted(db, problem) -> int:
+    return perf_index.summary(db, problem.id)["accepted"]
+
+def test_one_histogram_entry_per_user_on_every_path(client, auth, db, problem):
+    _submit(client, auth, problem, GOOD)
+    assert _accepted(db, problem) == 1
+    _submit(client, auth, problem, GOOD)  # verdict cache hit
+    _submit(client, auth, problem, GOOD + "  # judged again")  # fresh run
+    _submit(client, auth, problem, GOOD + "  # queued", wait=False)  # fresh run on the judge queue
+    assert _accepted(db, problem) == 1
+
+    client.post("/auth/register", json={"email": "second@example.com", "password": "secret123"})
+    token = client.post("/auth/login", data={"username": "second@example.com", "password": "secret123"}).json()
+    other = {"Authorization": f"Bearer {token['access_token']}"}
+    _submit(client, other, problem, GOOD)  # cached, but this user's first
+    assert _accepted(db, problem) == 2
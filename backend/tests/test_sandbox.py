@@ -0,0 +1,107 @@
+import os, time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import run_uids, runner, sandbox
+
+BACKENDS = ["forkserver", "subprocess"] if sandbox.available() else ["subprocess"]
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(runner.settings, "RUNNER_BACKEND", request.param)
+    return request.param
+
+# walks every frame above the program and every object the interpreter holds, printing
+# anything that looks like the expected output
+SNOOP = """
+import gc, sys
+needle = "answer-"
+seen = []
+f = sys._getframe()
+while f is not None:
+    for v in list(f.f_locals.values()) + list(f.f_globals.values()):
+        if isinstance(v, bytes):
+            v = v.decode(errors="replace")
+        if isinstance(v, str) and v.startswith(needle) and v != needle:
+            seen.append(v)
+    f = f.f_back
+for o in gc.get_objects():
+    if isinstance(o, dict):
+        for v in o.values():
+            if isinstance(v, str) and v.startswith(needle) and v != needle:
+                seen.append(v)
+print(seen[0] if seen else "nothing")
+"""
+
+def test_expected_output_is_not_reachable_from_the_run(backend):
+    r = runner.run_python(SNOOP, "", timeout_sec=5.0, expected="answer-4242")
+    assert r["status"] == "WA"
+    assert "answer-4242" not in r["stdout"]
+
+def test_mismatch_stops_the_run_early(backend):
+    code = "import time\nprint('wrong', flush=True)\ntime.sleep(30)\n"
+    t0 = time.perf_counter()
+    r = runner.run_python(code, "", timeout_sec=10.0, expected="right")
+    assert r["status"] == "WA"
+    assert time.perf_counter() - t0 < 5.0
+
+def test_streamed_output_is_compared(backend):
+    code = "for i in range(100000):\n    print(i)\n"
+    expected = "\n".join(map(str, range(100000)))
+    assert runner.run_python(code, "", timeout_sec=10.0, expected=expected)["status"] == "OK"
+    assert runner.run_python(code, "", timeout_sec=10.0, expected=expected + "\n1")["status"] == "WA"
+
+THREADED = """
+import threading
+total = []
+workers = [threading.Thread(target=lambda i=i: total.append(sum(range(i * 1000)))) for i in range(8)]
+for w in workers:
+    w.start()
+for w in workers:
+    w.join()
+print(len(total))
+"""
+
+def test_threaded_solutions_run_concurrently(backend):
+    # eight runs of nine threads each would not fit in one shared JUDGE_MAX_PROCS budget
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: runner.run_python(THREADED, "", timeout_sec=10.0, expected="8"), range(8)))
+    assert [r["status"] for r in results] == ["OK"] * 8, [r["stderr"] for r in results]
+
+FORK_BOMB = """
+import os, time
+forked = 0
+try:
+    while True:
+        if os.fork() == 0:
+            os.setsid()  # leave the run's process group
+            os.closerange(0, 3)  # and let it see EOF
+            time.sleep(60)
+            os._exit(0)
+        forked += 1
+except OSError:
+    pass
+print(forked)
+"""
+
+def _processes_of(uids: range) -> list[int]:
+    found = []
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            if os.stat(f"/proc/{pid}").st_uid in uids:
+                found.append(int(pid))
+        except FileNotFoundError:
+            pass
+    return found
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="runs only drop their uid under root")
+def test_fork_bomb_is_contained(backend):
+    r = runner.run_python(FORK_BOMB, "", timeout_sec=5.0)
+    assert r["status"] == "OK"
+    assert int(r["stdout"]) < runner.settings.JUDGE_MAX_PROCS
+    uids = range(run_uids.pool.first, run_uids.pool.first + run_uids.pool.count)
+    deadline = time.monotonic() + 2.0  # killed processes linger until init reaps them
+    while _processes_of(uids) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _processes_of(uids) == []
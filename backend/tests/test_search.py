@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
+from app.models.problem import Problem
+
+@pytest.fixture(scope="module")
+def many(client):
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    rows = [Problem(title=f"Zebra crossing {n:02d}", slug=f"zebra-{n}", body="count the zebra stripes",
+                    domain="dsa", difficulty=("easy", "hard")[n % 2]) for n in range(25)]
+    db.add_all(rows)
+    db.commit()
+    out = [(p.id, p.title, p.created_at) for p in rows]
+    db.close()
+    return out
+
+def _walk(client, sort, limit, **params):
+    ids, cursor = [], None
+    while True:
+        page = client.get("/problems/search", params={"q": "zebra", "sort": sort, "limit": limit,
+                                                     **params, **({"cursor": cursor} if cursor else {})}).json()
+        ids += [p["id"] for p in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, page["total"]
+
+@pytest.mark.parametrize("sort, key, reverse", [
+    ("created_desc", lambda r: (r[2], r[0]), True),
+    ("created_asc", lambda r: (r[2], r[0]), False),
+    ("title_asc", lambda r: (r[1], r[0]), False),
+])
+def test_sorted_search_pages_follow_the_sort(client, many, sort, key, reverse):
+    ids, total = _walk(client, sort, 7)
+    assert total == 25
+    assert ids == [r[0] for r in sorted(many, key=key, reverse=reverse)]
+
+def test_relevance_pages_cover_every_hit_once(client, many):
+    ids, total = _walk(client, "relevance", 6, difficulty="hard")
+    assert total == 12
+    assert sorted(ids) == sorted(r[0] for r in many[1::2])
+
+def test_only_the_page_is_read_from_the_database(client, many):
+    params = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM problems" in statement and " IN (" in statement:
+            params.append(len(parameters))
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for sort in ("relevance", "title_asc"):
+            client.get("/problems/search", params={"q": "zebra stripes", "sort": sort, "limit": 4})
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert params and max(params) <= 4
+
+def test_offload_leaves_the_event_loop(monkeypatch):
+    # under async_route the endpoint body runs in a greenlet on the loop; ranking must not
+    import asyncio, threading
+    from sqlalchemy.util.concurrency import greenlet_spawn
+    from app.db import session
+
+    monkeypatch.setattr(session.settings, "DB_ASYNC", True)
+    loop_thread = threading.get_ident()
+    ran_in = asyncio.run(greenlet_spawn(session.offload, threading.get_ident))
+    assert ran_in != loop_thread
+    assert session.offload(threading.get_ident) == loop_thread
@@ -0,0 +1,36 @@
+import os, subprocess, sys, textwrap
+
+import pytest
+
+from app.services import sql_datasets
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# stands in for a worker starting up: counts its builds of "tiny" in builds.log
+WORKER = textwrap.dedent("""
+    import sys, time
+    from app.services import sql_datasets
+
+    spec = sql_datasets.SPECS["tiny"]
+    def build(conn, rows):
+        with open(sys.argv[1], "a") as log:
+            log.write("built\\n")
+        time.sleep(0.5)
+        spec.build(conn, rows)
+    sql_datasets.SPECS["tiny"] = spec._replace(build=build)
+    if sys.argv[2] == "prebuild":
+        sql_datasets.prebuild().join()
+    print(sql_datasets.ensure_snapshot("tiny").stat().st_size)
+""")
+
+@pytest.mark.skipif(sql_datasets.fcntl is None, reason="needs flock")
+@pytest.mark.parametrize("entry", ["query", "prebuild"])
+def test_concurrent_workers_build_a_snapshot_once(tmp_path, entry):
+    env = dict(os.environ, SQL_DATASET_DIR=str(tmp_path / "snapshots"), PYTHONPATH=BACKEND)
+    log = tmp_path / "builds.log"
+    workers = [subprocess.Popen([sys.executable, "-c", WORKER, str(log), entry], env=env,
+                                stdout=subprocess.PIPE, text=True) for _ in range(4)]
+    sizes = {w.communicate(timeout=60)[0].strip() for w in workers}
+    assert all(w.returncode == 0 for w in workers)
+    assert log.read_text().count("built") == 1
+    assert len(sizes) == 1 and int(sizes.pop()) > 0
@@ -0,0 +1,33 @@
+import pytest
+
+from app.services import sql_judge
+
+def judge(code, reference, ordered=False, tolerance=0.01):
+    overall, results, _ = sql_judge.judge_sql(code, "tiny", reference, ordered, tolerance)
+    return overall, results[0]["stderr"]
+
+# 0.125 is a half-way point of a 0.01 grid: rounding sends either side to a different bucket
+@pytest.mark.parametrize("got", ["0.12500000000000003", "0.12499999999999997", "0.129", "0.116"])
+def test_values_within_tolerance_across_a_rounding_boundary(got):
+    assert judge(f"SELECT {got}", "SELECT 0.125") == ("Accepted", "")
+
+def test_values_outside_tolerance():
+    assert judge("SELECT 0.136", "SELECT 0.125") == ("Wrong Answer", "Rows differ from the expected result")
+
+def test_rows_are_matched_regardless_of_order():
+    reference = "SELECT n, n / 8.0 FROM nums"
+    assert judge("SELECT n, n / 8.0 + 0.004 FROM nums ORDER BY n DESC", reference)[0] == "Accepted"
+    assert judge("SELECT 6 - n, n / 8.0 FROM nums", reference)[0] == "Wrong Answer"
+
+def test_exact_columns_are_not_given_the_tolerance():
+    assert judge("SELECT n + 0.001 FROM nums", "SELECT n FROM nums")[0] == "Accepted"
+    assert judge("SELECT 'a', 0.125", "SELECT 'b', 0.125")[0] == "Wrong Answer"
+
+def test_order_is_still_checked_within_tolerance():
+    reference = "SELECT n / 8.0 FROM nums ORDER BY n"
+    assert judge("SELECT n / 8.0 + 0.001 FROM nums ORDER BY n", reference, ordered=True)[0] == "Accepted"
+    assert judge("SELECT n / 8.0 + 0.001 FROM nums ORDER BY n DESC", reference, ordered=True) == (
+        "Wrong Answer", "Rows match but are not in the expected order")
+
+def test_trailing_semicolon_and_comment():
+    assert judge("SELECT 0.12500000000000003; -- done", "SELECT 0.125")[0] == "Accepted"
@@ -33,7 +33,10 @@ export default function App() {
   const [total, setTotal] = useState(0)
   const [limit, setLimit] = useState(10)
   const [offset, setOffset] = useState(0)
-  const [sort, setSort] = useState("created_desc")
+  const [sort, setSort] = useState("relevance")
+  // cursors[i] fetches page i; the first page has none
+  const [cursors, setCursors] = useState([null])
+  const [nextCursor, setNextCursor] = useState(null)
 
   useEffect(() => {
     fetchHealth().then(setHealth).catch(() => setHealth({ status: "error" }))
@@ -41,7 +44,7 @@ export default function App() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [])
 
-  async function loadPaged(nextOffset = offset, nextLimit = limit) {
+  async function loadPaged(nextOffset = offset, nextLimit = limit, cursor = null) {
     const res = await fetchProblemsPaged({
       q,
       domain: filterDomain || undefined,
@@ -49,9 +52,12 @@ export default function App() {
       sort,
       limit: nextLimit,
       offset: nextOffset,
+      cursor,
     })
+    if (nextOffset === 0) setCursors([null])
     setItems(res.items || [])
     setTotal(res.total || 0)
+    setNextCursor(res.next_cursor || null)
   }
 
   async function onCreate(e) {
@@ -73,13 +79,16 @@ export default function App() {
   }
   function onPrev() {
     const n = Math.max(0, offset - limit)
+    const page = cursors.slice(0, -1)
+    setCursors(page.length ? page : [null])
     setOffset(n)
-    loadPaged(n)
+    loadPaged(n, limit, page[page.length - 1] || null)
   }
   function onNext() {
     const n = offset + limit
+    setCursors([...cursors, nextCursor])
     setOffset(n)
-    loadPaged(n)
+    loadPaged(n, limit, nextCursor)
   }
   function onChangeLimit(newLimit) {
     setLimit(newLimit)
@@ -197,6 +206,7 @@ export default function App() {
               }}
               className="border border-gray-300 dark:border-gray-700 bg-white dark:bg-gray-950 rounded px-3 py-2"
             >
+              <option value="relevance">best match</option>
               <option value="created_desc">newest first</option>
               <option value="created_asc">oldest first</option>
               <option value="title_asc">title A to Z</option>
@@ -241,7 +251,7 @@ export default function App() {
               Prev
             </button>
             <button
-              disabled={offset + items.length >= total}
+              disabled={!nextCursor}
               onClick={onNext}
               className="border border-gray-300 dark:border-gray-700 px-3 py-2 rounded disabled:opacity-50 hover:bg-gray-50 dark:hover:bg-gray-800"
             >
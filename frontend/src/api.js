@@ -67,15 +67,16 @@ export async function submitCode(payload) {
 
 export async function fetchProblemsPaged(params = {}) {
   const url = new URL(`${API_BASE}/problems/search`)
-  const { q, domain, difficulty, sort = "created_desc", limit = 10, offset = 0 } = params
+  const { q, domain, difficulty, sort = "created_desc", limit = 10, offset = 0, cursor } = params
   if (q) url.searchParams.set("q", q)
   if (domain) url.searchParams.set("domain", domain)
   if (difficulty) url.searchParams.set("difficulty", difficulty)
   url.searchParams.set("sort", sort)
   url.searchParams.set("limit", String(limit))
-  url.searchParams.set("offset", String(offset))
+  if (cursor) url.searchParams.set("cursor", cursor)
+  else url.searchParams.set("offset", String(offset))
   const res = await fetch(url)
-  return res.json()  // { items, total, limit, offset }
+  return res.json()  // { items, total, limit, offset, next_cursor }
 }
 
 export async function listSubmissionHistory(problemId) {